@@ -0,0 +1,46 @@
+import statistics
+import sys
+import time
+
+import numpy as np
+
+from cnnTrimChecker.cnn_config import CNN_INPUT_SIZE, SEQUENCE_1
+from cnnTrimChecker.cnn_service.cnn_predict import CompiledCnnModel, load_cnn_model
+
+# Batch sizes seen in serving: a single check and a trim batch of 8 candidates x 4 rotations
+BATCH_SIZES = [1, 4, 32]
+
+
+def measure(predict, images, repeats, warmup=3):
+    for _ in range(warmup):
+        predict(images, verbose=0)
+
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        predict(images, verbose=0)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), np.percentile(timings, 95)
+
+
+def main(model_name=SEQUENCE_1["model_name"], repeats=50):
+    keras_model = load_cnn_model(model_name, compiled=False)
+    compiled_model = CompiledCnnModel(keras_model)
+
+    print(f"CNN {model_name}, median / p95 latency per call over {repeats} calls")
+    for batch_size in BATCH_SIZES:
+        images = np.random.rand(batch_size, CNN_INPUT_SIZE[1], CNN_INPUT_SIZE[0], 3).astype('float32')
+
+        keras_prediction = keras_model.predict(images, verbose=0)
+        compiled_prediction = compiled_model.predict(images)
+        max_diff = float(np.max(np.abs(keras_prediction - compiled_prediction)))
+
+        keras_median, keras_p95 = measure(keras_model.predict, images, repeats)
+        compiled_median, compiled_p95 = measure(compiled_model.predict, images, repeats)
+        print(f"  batch {batch_size:>3}: Model.predict {keras_median * 1000:8.2f} / {keras_p95 * 1000:8.2f} ms   "
+              f"compiled {compiled_median * 1000:8.2f} / {compiled_p95 * 1000:8.2f} ms   "
+              f"speedup x{keras_median / compiled_median:.1f}   max |diff| {max_diff:.2e}")
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:2])
@@ -0,0 +1,68 @@
+import os
+import subprocess
+import sys
+import time
+
+from config import MAIN_PATH
+
+# Modules imported by each subsystem when it is first used
+SUBSYSTEMS = {
+    "service (main)": ["main"],
+    "bert": ["services.bert_predict", "transformers", "tensorflow"],
+    "cnn": ["cnnTrimChecker.cnn_service.cnn_predict", "tensorflow.keras.models"],
+    "yolo / ocr": ["services.receipt_trimmer", "services.image_ocr", "services.yolo_service.ocr", "ultralytics", "cv2",
+                   "pytesseract"]
+}
+
+
+def parse_importtime(stderr):
+    """Parses `-X importtime` output into [(package, depth, self_us, cumulative_us)]."""
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, package = line[len("import time:"):].split("|")
+        depth = (len(package) - len(package.lstrip())) // 2
+        entries.append((package.strip(), depth, int(self_us), int(cumulative_us)))
+    return entries
+
+
+def measure_import(module_name):
+    start = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module_name}"],
+        cwd=MAIN_PATH,
+        env={**os.environ, "PYTHONPATH": MAIN_PATH, "TF_CPP_MIN_LOG_LEVEL": "3"},
+        capture_output=True,
+        text=True
+    )
+    wall_seconds = time.perf_counter() - start
+
+    if completed.returncode != 0:
+        return wall_seconds, None
+    return wall_seconds, parse_importtime(completed.stderr)
+
+
+def print_breakdown(entries, top_n):
+    top_level = sorted((entry for entry in entries if entry[1] <= 1), key=lambda entry: entry[3], reverse=True)
+    for package, _, self_us, cumulative_us in top_level[:top_n]:
+        print(f"    {package:<50}{cumulative_us / 1000:>10.1f} ms  (self {self_us / 1000:.1f} ms)")
+
+
+def main(top_n=10):
+    for subsystem, module_names in SUBSYSTEMS.items():
+        print(f"\n=== {subsystem} ===")
+        for module_name in module_names:
+            wall_seconds, entries = measure_import(module_name)
+            if entries is None:
+                print(f"  {module_name}: import failed (not installed?)")
+                continue
+
+            cumulative_us = next((entry[3] for entry in reversed(entries) if entry[0] == module_name), None)
+            cumulative_ms = f"{cumulative_us / 1000:.1f} ms" if cumulative_us is not None else "already imported"
+            print(f"  {module_name}: {cumulative_ms} (process wall time {wall_seconds:.2f} s)")
+            print_breakdown(entries, top_n)
+
+
+if __name__ == "__main__":
+    main()
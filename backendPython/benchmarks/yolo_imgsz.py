@@ -0,0 +1,73 @@
+import os
+import statistics
+import sys
+import time
+
+from config import YOLO_MODEL
+from services.image_ocr import load_image, load_model
+from services.model_registry import get_yolo_weights_path
+from services.yolo_service.yolo import predict, get_best_detections
+from yoloTrainer.example_receipts_data import receipts_data
+from yoloTrainer.yolo_config import CLASS_NAMES
+
+# None - square 640 (Ultralytics default), tuples - (height, width) letterboxed rectangles
+IMGSZ_CANDIDATES = [None, (640, 320), (640, 256), (800, 384), (960, 448)]
+IMAGES_FOLDER = os.path.join('..', 'frontend', 'public', 'exampleReceipts')
+
+
+def load_receipts(trim):
+    images = []
+    cnn_model = None
+    if trim:
+        from cnnTrimChecker.cnn_config import SEQUENCE_1
+        from cnnTrimChecker.cnn_service.cnn_predict import load_cnn_model
+        from services.receipt_trimmer import perform_trimming
+        cnn_model = load_cnn_model(SEQUENCE_1["model_name"])
+
+    for receipt in receipts_data:
+        image_path = os.path.join(IMAGES_FOLDER, receipt[0] + ".jpg")
+        if not os.path.isfile(image_path):
+            continue
+        image = load_image(image_path)
+        if cnn_model is not None:
+            image, _ = perform_trimming(image, SEQUENCE_1["combination_list"], cnn_model)
+        images.append(image)
+    return images
+
+
+def measure(model, images, imgsz):
+    predict(model, images[0], imgsz)
+
+    timings = []
+    detected = {class_name: 0 for class_name in CLASS_NAMES}
+    for image in images:
+        start = time.perf_counter()
+        detections = get_best_detections(predict(model, image, imgsz))
+        timings.append(time.perf_counter() - start)
+        for class_id in detections['class_id']:
+            detected[CLASS_NAMES[class_id]] += 1
+    return timings, detected
+
+
+def main(backend='pt', trim=True):
+    """
+    Latency and per-class recall of YOLO_MODEL for each input size in IMGSZ_CANDIDATES on the example receipts
+    (trimmed first, as in the service, unless `trim` is False). Every example receipt contains all fields, so
+    recall is the fraction of receipts on which a class is detected.
+    """
+    model = load_model(get_yolo_weights_path(YOLO_MODEL, backend))
+    images = load_receipts(trim)
+    print(f"{YOLO_MODEL} ({backend}), {len(images)} receipts{' trimmed' if trim else ''}\n")
+    print(f"{'imgsz':<12}{'median ms':>10}{'p95 ms':>10}  " + "".join(f"{name:>20}" for name in CLASS_NAMES))
+
+    for imgsz in IMGSZ_CANDIDATES:
+        timings, detected = measure(model, images, imgsz)
+        p95 = sorted(timings)[int(0.95 * (len(timings) - 1))]
+        label = "640x640" if imgsz is None else f"{imgsz[0]}x{imgsz[1]}"
+        print(f"{label:<12}{statistics.median(timings) * 1000:>10.1f}{p95 * 1000:>10.1f}  "
+              + "".join(f"{detected[name] / len(images):>20.3f}" for name in CLASS_NAMES))
+
+
+if __name__ == "__main__":
+    arguments = [argument for argument in sys.argv[1:] if argument != "--no-trim"]
+    main(arguments[0] if arguments else 'pt', trim="--no-trim" not in sys.argv)
@@ -1,14 +1,16 @@
+import hashlib
 import os
 
-import tensorflow as tf
+from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import LabelEncoder
 
-from bertTrainer.bert_config import BERT_DATA_PATH, BERT_BATCH_SIZE
+from bertTrainer.bert_config import BERT_DATA_PATH, BERT_BATCH_SIZE, BERT_MAX_LENGTH, BERT_TEST_SIZE, BERT_MODEL_PATH, \
+    BERT_SPLIT_FILE
 
 
 def get_bert_data_dict():
     data_dict = {}
-    for filename in os.listdir(BERT_DATA_PATH):
+    for filename in sorted(os.listdir(BERT_DATA_PATH)):
         category = filename.split('.')[0]
         file_path = os.path.join(BERT_DATA_PATH, filename)
         with open(file_path, 'r', encoding='utf-8') as file:
@@ -17,7 +19,7 @@ def get_bert_data_dict():
             duplicates = [phrase for phrase in phrases if phrases.count(phrase) > 1]
             if duplicates:
                 print(f"Duplicates in category '{category}': {set(duplicates)}")
-            data_dict[category] = list(set(phrases))
+            data_dict[category] = sorted(set(phrases))
     return data_dict
 
 
@@ -29,7 +31,56 @@ def get_pair_list(data_dict):
     return data
 
 
-def tokenize_texts(texts, tokenizer, max_length=32):
+def split_data(texts, encoded_labels):
+    train_texts, temp_texts, train_labels, temp_labels = train_test_split(
+        texts,
+        encoded_labels,
+        test_size=BERT_TEST_SIZE,
+        random_state=42,
+        stratify=encoded_labels
+    )
+
+    val_texts, test_texts, val_labels, test_labels = train_test_split(
+        temp_texts,
+        temp_labels,
+        test_size=0.5,
+        random_state=42,
+        stratify=temp_labels
+    )
+
+    return (train_texts, train_labels), (val_texts, val_labels), (test_texts, test_labels)
+
+
+def split_fingerprint(test_texts):
+    return hashlib.sha256("\n".join(sorted(test_texts)).encode('utf-8')).hexdigest()
+
+
+def save_split_fingerprint(model_name, test_texts):
+    with open(os.path.join(BERT_MODEL_PATH, model_name, BERT_SPLIT_FILE), 'w', encoding='utf-8') as file:
+        file.write(split_fingerprint(test_texts))
+
+
+def is_held_out(model_name, test_texts):
+    """
+    True if `model_name` was trained with the current split, so `test_texts` were held out from its training.
+    Otherwise prints a warning: accuracy measured on `test_texts` may include training examples of the model.
+    """
+    path = os.path.join(BERT_MODEL_PATH, model_name, BERT_SPLIT_FILE)
+    if os.path.isfile(path):
+        with open(path, 'r', encoding='utf-8') as file:
+            if file.read().strip() == split_fingerprint(test_texts):
+                return True
+        reason = "was trained with a different test split"
+    else:
+        reason = "has no record of its test split (trained before the split was deterministic)"
+
+    print(f"WARNING: model {model_name} {reason}. The test split may overlap its training data, so its accuracy "
+          f"is inflated and comparisons against it are weaker. Train a baseline with bert_train.py and pass its "
+          f"name to compare on held-out data.")
+    return False
+
+
+def tokenize_texts(texts, tokenizer, max_length=BERT_MAX_LENGTH):
     tokenized_inputs = tokenizer(
         texts,
         padding=True,
@@ -47,6 +98,7 @@ def encode_labels(labels):
 
 
 def create_tf_dataset(tokenized_inputs, labels):
+    import tensorflow as tf
     labels = tf.convert_to_tensor(labels)
     dataset = tf.data.Dataset.from_tensor_slices((dict(tokenized_inputs), labels))
     dataset = dataset.shuffle(len(labels)).batch(BERT_BATCH_SIZE).cache().prefetch(tf.data.AUTOTUNE)
@@ -0,0 +1,84 @@
+import time
+
+import numpy as np
+import tensorflow as tf
+from transformers import BertConfig, TFBertForSequenceClassification
+
+from bertTrainer.bert_config import BERT_STUDENT_CONFIG, BERT_STUDENT_EPOCHS, BERT_STUDENT_BATCH_SIZE, \
+    BERT_STUDENT_LEARNING_RATE, BERT_DISTILLATION_TEMPERATURE, BERT_DISTILLATION_ALPHA
+from services.bert_predict import predict_probabilities
+
+
+def create_student_model(tokenizer, num_labels):
+    config = BertConfig(
+        vocab_size=len(tokenizer),
+        pad_token_id=tokenizer.pad_token_id,
+        num_labels=num_labels,
+        **BERT_STUDENT_CONFIG
+    )
+    return TFBertForSequenceClassification(config)
+
+
+def create_distillation_dataset(tokenized_inputs, labels, teacher_logits):
+    dataset = tf.data.Dataset.from_tensor_slices((dict(tokenized_inputs), labels, teacher_logits))
+    return dataset.shuffle(len(labels)).batch(BERT_STUDENT_BATCH_SIZE).prefetch(tf.data.AUTOTUNE)
+
+
+def train_student(student, train_dataset, val_inputs, val_labels):
+    optimizer = tf.keras.optimizers.Adam(learning_rate=BERT_STUDENT_LEARNING_RATE)
+    hard_loss_fn = tf.keras.losses.SparseCategoricalCrossentropy(from_logits=True)
+    soft_loss_fn = tf.keras.losses.KLDivergence()
+    temperature = BERT_DISTILLATION_TEMPERATURE
+    alpha = BERT_DISTILLATION_ALPHA
+
+    @tf.function
+    def train_step(inputs, labels, teacher_logits):
+        with tf.GradientTape() as tape:
+            student_logits = student(**inputs, training=True).logits
+            soft_loss = soft_loss_fn(
+                tf.nn.softmax(teacher_logits / temperature),
+                tf.nn.softmax(student_logits / temperature)
+            ) * temperature ** 2
+            hard_loss = hard_loss_fn(labels, student_logits)
+            loss = alpha * soft_loss + (1 - alpha) * hard_loss
+        gradients = tape.gradient(loss, student.trainable_variables)
+        optimizer.apply_gradients(zip(gradients, student.trainable_variables))
+        return loss
+
+    for epoch in range(1, BERT_STUDENT_EPOCHS + 1):
+        losses = [float(train_step(inputs, labels, teacher_logits))
+                  for inputs, labels, teacher_logits in train_dataset]
+
+        val_logits = student(**dict(val_inputs), training=False).logits
+        val_accuracy = float(np.mean(np.argmax(val_logits, axis=1) == np.asarray(val_labels)))
+        print(f"Epoch {epoch}/{BERT_STUDENT_EPOCHS} - loss: {np.mean(losses):.4f} - val_accuracy: {val_accuracy:.4f}")
+
+    return student
+
+
+def measure_model(model, tokenizer, texts, labels, latency_sample_size=200):
+    start = time.perf_counter()
+    probabilities = predict_probabilities(texts, model, tokenizer, max_chunk_size=64)
+    batch_time = time.perf_counter() - start
+    accuracy = float(np.mean(np.argmax(probabilities, axis=1) == np.asarray(labels)))
+
+    sample = texts[:latency_sample_size]
+    predict_probabilities(sample[:1], model, tokenizer)
+    start = time.perf_counter()
+    for text in sample:
+        predict_probabilities([text], model, tokenizer)
+    single_latency = (time.perf_counter() - start) / len(sample)
+
+    return {
+        "accuracy": accuracy,
+        "single_latency_ms": single_latency * 1000,
+        "batch_latency_ms": batch_time / len(texts) * 1000,
+        "parameters": model.count_params()
+    }
+
+
+def print_comparison(results):
+    print(f"\n{'Model':<10}{'Accuracy':>10}{'1 title [ms]':>15}{'Batched [ms/title]':>20}{'Parameters':>14}")
+    for name, result in results.items():
+        print(f"{name:<10}{result['accuracy']:>10.4f}{result['single_latency_ms']:>15.2f}"
+              f"{result['batch_latency_ms']:>20.3f}{result['parameters']:>14,}")
@@ -0,0 +1,55 @@
+import os
+
+import numpy as np
+
+from bertTrainer.bert_config import BERT_MODEL_PATH, BERT_ONNX_MODEL_FILE, BERT_ONNX_INT8_MODEL_FILE, \
+    BERT_QUANTIZATION_MAX_ACCURACY_DROP
+from bertTrainer.bert_categorizer.bert_data_processing import get_bert_data_dict, get_pair_list, split_data
+from services.bert_predict import predict_probabilities
+
+
+def get_test_split(label_encoder):
+    data = get_pair_list(get_bert_data_dict())
+    texts = [example[0] for example in data]
+    encoded_labels = label_encoder.transform([example[1] for example in data])
+
+    _, _, (test_texts, test_labels) = split_data(texts, encoded_labels)
+    return test_texts, np.asarray(test_labels)
+
+
+def evaluate_accuracy(model, tokenizer, texts, labels):
+    probabilities = predict_probabilities(texts, model, tokenizer, max_chunk_size=64)
+    return float(np.mean(np.argmax(probabilities, axis=1) == labels))
+
+
+def quantize_onnx_model(accuracy_str):
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+
+    model_dir = os.path.join(BERT_MODEL_PATH, accuracy_str)
+    input_path = os.path.join(model_dir, BERT_ONNX_MODEL_FILE)
+    output_path = os.path.join(model_dir, BERT_ONNX_INT8_MODEL_FILE + '.tmp')
+
+    quantize_dynamic(input_path, output_path, weight_type=QuantType.QInt8)
+    return output_path
+
+
+def publish_if_accurate(candidate_path, fp32_accuracy, int8_accuracy,
+                        max_accuracy_drop=BERT_QUANTIZATION_MAX_ACCURACY_DROP, held_out=True):
+    accuracy_drop = fp32_accuracy - int8_accuracy
+
+    print(f"FP32 test accuracy: {fp32_accuracy:.4f}")
+    print(f"INT8 test accuracy: {int8_accuracy:.4f}")
+    print(f"Accuracy drop: {accuracy_drop:.4f} (allowed: {max_accuracy_drop:.4f})")
+    if not held_out:
+        print("Note: measured on a split that may overlap the model's training data - the drop on unseen titles "
+              "can be larger than reported.")
+
+    if accuracy_drop > max_accuracy_drop:
+        os.remove(candidate_path)
+        print("INT8 model rejected - accuracy drop exceeds the threshold.")
+        return False
+
+    output_path = os.path.join(os.path.dirname(candidate_path), BERT_ONNX_INT8_MODEL_FILE)
+    os.replace(candidate_path, output_path)
+    print(f"INT8 model saved in: {output_path}")
+    return True
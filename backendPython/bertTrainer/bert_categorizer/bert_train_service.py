@@ -8,7 +8,8 @@ from sklearn.metrics import precision_score, recall_score, f1_score, confusion_m
 import numpy as np
 
 
-from bertTrainer.bert_config import BERT_MODEL, BERT_LEARNING_RATE, BERT_EPOCHS, BERT_MODEL_PATH
+from bertTrainer.bert_config import BERT_MODEL, BERT_LEARNING_RATE, BERT_EPOCHS, BERT_MODEL_PATH, \
+    BERT_ONNX_MODEL_FILE, BERT_ONNX_OPSET
 
 
 def train_model(train_dataset, val_dataset, num_labels, class_weights_dict):
@@ -66,8 +67,8 @@ def plot_training_history(history):
     plt.show()
 
 
-def save_model_and_tokenizer(model, tokenizer, label_encoder, accuracy):
-    accuracy_str = f"{accuracy:.4f}"
+def save_model_and_tokenizer(model, tokenizer, label_encoder, accuracy, name_suffix=""):
+    accuracy_str = f"{accuracy:.4f}{name_suffix}"
 
     model.save_pretrained(os.path.join(BERT_MODEL_PATH, accuracy_str, "model"))
     tokenizer.save_pretrained(os.path.join(BERT_MODEL_PATH, accuracy_str, "tokenizer"))
@@ -77,6 +78,41 @@ def save_model_and_tokenizer(model, tokenizer, label_encoder, accuracy):
     with open(encoder_path, 'wb') as f:
         pickle.dump(label_encoder, f)
 
+    return accuracy_str
+
+
+def export_onnx_model(model, accuracy, file_name=BERT_ONNX_MODEL_FILE):
+    import tf2onnx
+
+    accuracy_str = accuracy if isinstance(accuracy, str) else f"{accuracy:.4f}"
+    output_path = os.path.join(BERT_MODEL_PATH, accuracy_str, file_name)
+
+    input_signature = [
+        tf.TensorSpec((None, None), tf.int32, name="input_ids"),
+        tf.TensorSpec((None, None), tf.int32, name="attention_mask")
+    ]
+
+    @tf.function(input_signature=input_signature)
+    def serving(input_ids, attention_mask):
+        return {"logits": model(input_ids=input_ids, attention_mask=attention_mask).logits}
+
+    tf2onnx.convert.from_function(serving, input_signature=input_signature, opset=BERT_ONNX_OPSET,
+                                  output_path=output_path)
+    return output_path
+
+
+def check_top_k_parity(reference_probabilities, candidate_probabilities, k=3, atol=1e-3):
+    reference_top_k = np.argsort(-reference_probabilities, axis=1)[:, :k]
+    candidate_top_k = np.argsort(-candidate_probabilities, axis=1)[:, :k]
+
+    mismatched_rows = np.where((reference_top_k != candidate_top_k).any(axis=1))[0]
+    max_abs_diff = float(np.abs(reference_probabilities - candidate_probabilities).max())
+
+    print(f"Top-{k} mismatches: {len(mismatched_rows)}/{len(reference_probabilities)}")
+    print(f"Max absolute probability difference: {max_abs_diff:.6f}")
+
+    return len(mismatched_rows) == 0 and max_abs_diff <= atol
+
 
 def print_metrics(model, test_dataset, test_labels):
     predictions = model.predict(test_dataset).logits
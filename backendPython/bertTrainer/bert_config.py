@@ -11,3 +11,36 @@ BERT_BATCH_SIZE = 16
 BERT_MODEL = 'allegro/herbert-large-cased'
 BERT_LEARNING_RATE = 3e-5
 BERT_TEST_SIZE = 0.16
+BERT_MAX_LENGTH = 32
+
+BERT_ONNX_MODEL_FILE = 'model.onnx'
+BERT_ONNX_INT8_MODEL_FILE = 'model.int8.onnx'
+BERT_ONNX_MODEL_FILES = {
+    'fp32': BERT_ONNX_MODEL_FILE,
+    'int8': BERT_ONNX_INT8_MODEL_FILE
+}
+BERT_ONNX_OPSET = 14
+
+# Fingerprint of the test split a model was trained with, saved next to it; models without it (trained before the
+# split was deterministic, e.g. 0.9228) may have been trained on part of the current test split
+BERT_SPLIT_FILE = 'test_split.sha256'
+
+# Distillation of the fine-tuned model (teacher) into a small BERT (student)
+BERT_STUDENT_CONFIG = {
+    'hidden_size': 256,
+    'num_hidden_layers': 4,
+    'num_attention_heads': 4,
+    'intermediate_size': 1024,
+    'max_position_embeddings': 64
+}
+BERT_STUDENT_EPOCHS = 10
+BERT_STUDENT_BATCH_SIZE = 32
+BERT_STUDENT_LEARNING_RATE = 5e-4
+BERT_DISTILLATION_TEMPERATURE = 2.0
+BERT_DISTILLATION_ALPHA = 0.7  # weight of the teacher (soft) loss, 1 - alpha for the true labels
+
+# The INT8 variant is not published if its top-1 test accuracy is lower than FP32 by more than this
+BERT_QUANTIZATION_MAX_ACCURACY_DROP = 0.01
+
+# Upper token-length bounds of inference buckets, titles are padded only up to their bucket
+BERT_LENGTH_BUCKETS = (8, 16, BERT_MAX_LENGTH)
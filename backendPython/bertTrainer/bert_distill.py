@@ -0,0 +1,52 @@
+import os
+import sys
+
+from bertTrainer.bert_categorizer.bert_data_processing import get_bert_data_dict, get_pair_list, tokenize_texts, \
+    split_data, is_held_out, save_split_fingerprint
+from bertTrainer.bert_categorizer.bert_distillation_service import create_student_model, \
+    create_distillation_dataset, train_student, measure_model, print_comparison
+from bertTrainer.bert_categorizer.bert_train_service import save_model_and_tokenizer, export_onnx_model
+from services.bert_predict import load_model_and_tokenizer, predict_logits
+
+
+if __name__ == '__main__':
+
+    os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
+    # Optional baseline: a model trained with bert_train.py on the current split, measured on held-out data when
+    # the teacher was not
+    teacher_name = sys.argv[1] if len(sys.argv) > 1 else "0.9228"
+    baseline_name = sys.argv[2] if len(sys.argv) > 2 else None
+
+    teacher, tokenizer, label_encoder = load_model_and_tokenizer(teacher_name, backend="tf")
+
+    data = get_pair_list(get_bert_data_dict())
+    texts = [example[0] for example in data]
+    encoded_labels = label_encoder.transform([example[1] for example in data])
+
+    (train_texts, train_labels), (val_texts, val_labels), (test_texts, test_labels) = split_data(texts, encoded_labels)
+
+    is_held_out(teacher_name, test_texts)
+
+    teacher_logits = predict_logits(train_texts, teacher, tokenizer, max_chunk_size=64)
+
+    train_inputs = tokenize_texts(train_texts, tokenizer)
+    val_inputs = tokenize_texts(val_texts, tokenizer)
+    train_dataset = create_distillation_dataset(train_inputs, train_labels, teacher_logits)
+
+    student = create_student_model(tokenizer, len(label_encoder.classes_))
+    student = train_student(student, train_dataset, val_inputs, val_labels)
+
+    results = {
+        "teacher": measure_model(teacher, tokenizer, test_texts, test_labels),
+        "student": measure_model(student, tokenizer, test_texts, test_labels)
+    }
+    if baseline_name is not None and is_held_out(baseline_name, test_texts):
+        baseline, baseline_tokenizer, _ = load_model_and_tokenizer(baseline_name, backend="tf")
+        results["baseline"] = measure_model(baseline, baseline_tokenizer, test_texts, test_labels)
+    print_comparison(results)
+
+    student_name = save_model_and_tokenizer(student, tokenizer, label_encoder, results["student"]["accuracy"],
+                                            name_suffix="_student")
+    save_split_fingerprint(student_name, test_texts)
+    export_onnx_model(student, student_name)
+    print(f"Student saved as BERT_MODEL_NAME = \"{student_name}\"")
@@ -0,0 +1,37 @@
+import os
+import random
+import sys
+
+from bertTrainer.bert_config import BERT_ONNX_MODEL_FILE
+from bertTrainer.bert_categorizer.bert_data_processing import get_bert_data_dict, get_pair_list
+from bertTrainer.bert_categorizer.bert_train_service import export_onnx_model, check_top_k_parity
+from services.bert_predict import load_model_and_tokenizer, predict_probabilities, OnnxSequenceClassifier
+
+
+if __name__ == '__main__':
+
+    os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
+    model_name = "0.9228"
+    parity_sample_size = 500
+
+    # Exported next to the model under a temporary name and only moved to model.onnx once it matches TF
+    model, tokenizer, label_encoder = load_model_and_tokenizer(model_name, backend="tf")
+    candidate_path = export_onnx_model(model, model_name, file_name=BERT_ONNX_MODEL_FILE + '.tmp')
+
+    texts = [text for text, _ in get_pair_list(get_bert_data_dict())]
+    texts = random.Random(42).sample(texts, min(parity_sample_size, len(texts)))
+
+    onnx_model = OnnxSequenceClassifier(candidate_path)
+    tf_probabilities = predict_probabilities(texts, model, tokenizer, max_chunk_size=64)
+    onnx_probabilities = predict_probabilities(texts, onnx_model, tokenizer, max_chunk_size=64)
+    del onnx_model
+
+    if not check_top_k_parity(tf_probabilities, onnx_probabilities, k=3):
+        os.remove(candidate_path)
+        print("ONNX backend DOES NOT match the TF backend - export rejected, do not switch BERT_BACKEND to 'onnx'.")
+        sys.exit(1)
+
+    output_path = os.path.join(os.path.dirname(candidate_path), BERT_ONNX_MODEL_FILE)
+    os.replace(candidate_path, output_path)
+    print("ONNX backend matches the TF backend.")
+    print(f"ONNX model saved in: {output_path}")
@@ -0,0 +1,34 @@
+import os
+import sys
+import time
+
+from bertTrainer.bert_categorizer.bert_data_processing import is_held_out
+from bertTrainer.bert_categorizer.bert_quantization_service import get_test_split, evaluate_accuracy, \
+    quantize_onnx_model, publish_if_accurate
+from services.bert_predict import load_model_and_tokenizer, OnnxSequenceClassifier
+
+
+if __name__ == '__main__':
+
+    os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
+    model_name = sys.argv[1] if len(sys.argv) > 1 else "0.9228"
+
+    fp32_model, tokenizer, label_encoder = load_model_and_tokenizer(model_name, backend="onnx", variant="fp32")
+    test_texts, test_labels = get_test_split(label_encoder)
+    held_out = is_held_out(model_name, test_texts)
+
+    candidate_path = quantize_onnx_model(model_name)
+    int8_model = OnnxSequenceClassifier(candidate_path)
+
+    start = time.perf_counter()
+    fp32_accuracy = evaluate_accuracy(fp32_model, tokenizer, test_texts, test_labels)
+    fp32_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    int8_accuracy = evaluate_accuracy(int8_model, tokenizer, test_texts, test_labels)
+    int8_time = time.perf_counter() - start
+
+    print(f"Test split: {len(test_texts)} titles, FP32: {fp32_time:.2f}s, INT8: {int8_time:.2f}s")
+
+    del int8_model
+    publish_if_accurate(candidate_path, fp32_accuracy, int8_accuracy, held_out=held_out)
@@ -2,13 +2,13 @@ import os
 
 import numpy as np
 from transformers import AutoTokenizer
-from sklearn.model_selection import train_test_split
 from sklearn.utils.class_weight import compute_class_weight
 from bert_categorizer.bert_data_processing import get_bert_data_dict, get_pair_list, tokenize_texts, encode_labels, \
-    create_tf_dataset
-from bert_categorizer.bert_train_service import train_model, plot_training_history, save_model_and_tokenizer, print_metrics
+    create_tf_dataset, split_data, save_split_fingerprint
+from bert_categorizer.bert_train_service import train_model, plot_training_history, save_model_and_tokenizer, print_metrics, \
+    export_onnx_model
 
-from bert_config import BERT_MODEL, BERT_TEST_SIZE
+from bert_config import BERT_MODEL
 
 
 if __name__ == '__main__':
@@ -23,21 +23,7 @@ if __name__ == '__main__':
     encoded_labels, label_encoder = encode_labels(labels)
     num_labels = len(label_encoder.classes_)
 
-    train_texts, temp_texts, train_labels, temp_labels = train_test_split(
-        texts,
-        encoded_labels,
-        test_size=BERT_TEST_SIZE,
-        random_state=42,
-        stratify=encoded_labels
-    )
-
-    val_texts, test_texts, val_labels, test_labels = train_test_split(
-        temp_texts,
-        temp_labels,
-        test_size=0.5,
-        random_state=42,
-        stratify=temp_labels
-    )
+    (train_texts, train_labels), (val_texts, val_labels), (test_texts, test_labels) = split_data(texts, encoded_labels)
 
     class_weights = compute_class_weight(
         class_weight='balanced',
@@ -67,4 +53,6 @@ if __name__ == '__main__':
     loss, accuracy = model.evaluate(test_dataset)
     print(f"Test Loss: {loss:.4f}, Test Accuracy: {accuracy:.4f}")
 
-    save_model_and_tokenizer(model, tokenizer, label_encoder, accuracy)
+    model_name = save_model_and_tokenizer(model, tokenizer, label_encoder, accuracy)
+    save_split_fingerprint(model_name, test_texts)
+    export_onnx_model(model, accuracy)
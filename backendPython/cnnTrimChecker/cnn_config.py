@@ -8,6 +8,7 @@ CNN_BATCH_SIZE = 32
 
 CNN_MODEL_PATH = os.path.join(CNN_TRAINING_PATH, 'cnn_model')
 CNN_FIND_SEQUENCE_MODEL_NAME = '0.9737'
+CNN_COMPILED_INFERENCE = True  # serve the CNN through a tf.function concrete function instead of Model.predict
 CNN_DATA_PATH = os.path.join(CNN_TRAINING_PATH, 'cnn_data')
 
 # 35/958 źle sklasyfikowanych obrazów i źle przyciętych
@@ -190,3 +191,26 @@ SEQUENCE_3 = {
         ((19, 19), (13, 13), 3, 0.05, 0, 2),
     ]
 }
+
+# Sequences found for each CNN model; a hot-swapped CNN uses the sequence with its model_name
+TRIM_SEQUENCES = [SEQUENCE_1, SEQUENCE_2, SEQUENCE_3]
+
+# perform_trimming - quadrilaterals whose corners match on this grid (px) count as the same crop and are
+# classified once; quadrilaterals below the area ratio or score are skipped without calling the CNN
+TRIM_CONTOUR_GRID = 4
+TRIM_MIN_AREA_RATIO = 0.05
+TRIM_MIN_CONTOUR_SCORE = 0.6
+# Contour search runs on a copy downscaled to this longer side (None - full resolution), kernels scaled to match.
+# Off until validate_trim_proxy.py shows no loss of trimming accuracy on the labelled receipts with the CNN
+TRIM_PROXY_MAX_SIDE = None
+# Morphology results and contour lists kept per image while trying combinations (each entry is image-sized)
+TRIM_STAGE_CACHE_SIZE = 16
+# Trim candidates classified per CNN call (each with its 4 rotations, so 4x images per batch)
+TRIM_CANDIDATE_BATCH_SIZE = 8
+# Early rejection of non-receipts: images with less than TRIM_MIN_PAPER_RATIO of bright (HSV value >=
+# TRIM_PAPER_MIN_VALUE), unsaturated (saturation <= TRIM_PAPER_MAX_SATURATION) pixels on a TRIM_PAPER_CHECK_SIDE px
+# thumbnail skip trimming; the example receipts range from 0.074 to 0.553, None disables the check
+TRIM_MIN_PAPER_RATIO = 0.03
+TRIM_PAPER_CHECK_SIDE = 256
+TRIM_PAPER_MIN_VALUE = 150
+TRIM_PAPER_MAX_SATURATION = 60
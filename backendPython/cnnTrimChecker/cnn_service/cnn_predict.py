@@ -2,26 +2,68 @@ import os
 
 import numpy as np
 
-from cnnTrimChecker.cnn_config import CNN_MODEL_PATH
+from cnnTrimChecker.cnn_config import CNN_MODEL_PATH, CNN_COMPILED_INFERENCE
 from cnnTrimChecker.cnn_service.cnn_data_processing import process_image
 
 
-def check_trimmed_image(image, model):
+CLASS_NAMES = [
+    'negative',
+    'rotated',
+    'positive'
+]
+
 
-    class_names = [
-        'negative',
-        'rotated',
-        'positive'
-    ]
+def check_trimmed_image(image, model):
     image = process_image(image=image)
 
     image = image.astype('float32') / 255.0
     image = np.expand_dims(image, axis=0)
     prediction = model.predict(image, verbose=0)
     predicted_class = np.argmax(prediction, axis=1)[0]
-    return class_names[predicted_class]
+    return CLASS_NAMES[predicted_class]
+
+
+def check_trimmed_image_rotations(images, model):
+    """Returns (class name, k) for the first 90° clockwise rotation k of each image not classified as 'rotated'."""
+    if not images:
+        return []
+
+    batch = []
+    for image in images:
+        processed = process_image(image=image).astype('float32') / 255.0
+        batch.extend(np.rot90(processed, -k) for k in range(4))
+
+    prediction = model.predict(np.stack(batch), verbose=0)
+    predicted_classes = np.argmax(prediction, axis=1).reshape(len(images), 4)
+
+    results = []
+    for classes in predicted_classes:
+        not_rotated = np.flatnonzero(classes != CLASS_NAMES.index('rotated'))
+        if len(not_rotated) == 0:
+            results.append((None, 0))
+        else:
+            k = int(not_rotated[0])
+            results.append((CLASS_NAMES[classes[k]], k))
+    return results
+
+
+class CompiledCnnModel:
+    """Inference-only Keras model wrapper that calls a traced concrete function instead of `Model.predict`."""
+
+    def __init__(self, model):
+        import tensorflow as tf
+
+        self.model = model
+        self.tf = tf
+        input_signature = [tf.TensorSpec((None,) + tuple(model.input_shape[1:]), tf.float32)]
+        self.function = tf.function(lambda images: model(images, training=False),
+                                    input_signature=input_signature).get_concrete_function()
+
+    def predict(self, images, verbose=0):
+        return self.function(self.tf.convert_to_tensor(images, dtype=self.tf.float32)).numpy()
 
 
-def load_cnn_model(model_name):
+def load_cnn_model(model_name, compiled=CNN_COMPILED_INFERENCE):
     from tensorflow.keras.models import load_model
-    return load_model(os.path.join(CNN_MODEL_PATH, model_name + '.keras'))
\ No newline at end of file
+    model = load_model(os.path.join(CNN_MODEL_PATH, model_name + '.keras'))
+    return CompiledCnnModel(model) if compiled else model
\ No newline at end of file
@@ -5,7 +5,7 @@ from collections import defaultdict
 
 from cnnTrimChecker.cnn_service.cnn_predict import load_cnn_model
 from cnnTrimChecker.cnn_config import CNN_FIND_SEQUENCE_MODEL_NAME
-from services.receipt_trimmer import load_image, trim_receipt
+from services.receipt_trimmer import TrimPipeline, load_image, trim_receipt
 
 cnn_model = None
 
@@ -24,8 +24,13 @@ def process_image(filename, input_path, parameter_combinations):
         return []
 
     positive_combinations = []
+    pipeline = TrimPipeline(image)
 
-    for combination in parameter_combinations:
+    # Ordered so that consecutive combinations share the longest stage prefix (blur, morphology chain) and
+    # differ last in epsilon, which only re-runs the polygon approximation on cached contours
+    sorted_combinations = sorted(parameter_combinations, key=lambda c: (c[0], c[1], c[2], c[4], c[5], c[3]))
+
+    for combination in sorted_combinations:
         blur_kernel_size = combination[0]
         morph_kernel_size = combination[1]
         morph_iterations = combination[2]
@@ -41,7 +46,8 @@ def process_image(filename, input_path, parameter_combinations):
             morph_iterations,
             epsilon_factor,
             dilation_iterations,
-            erosion_iterations
+            erosion_iterations,
+            pipeline=pipeline
         )
         if result == 'positive':
             positive_combinations.append(combination)
@@ -0,0 +1,167 @@
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from cnnTrimChecker.cnn_config import SEQUENCE_1, TRIM_MIN_CONTOUR_SCORE
+from services.receipt_trimmer import TrimPipeline, load_image, perform_trimming, new_trimming_stats, score_contour
+from yoloTrainer.example_receipts_data import receipts_data
+
+# Longer side of the proxy validated when none is given (TRIM_PROXY_MAX_SIDE is off by default)
+PROXY_MAX_SIDE = 2000
+# Quadrilaterals from the proxy and from full resolution count as the same receipt outline above this IoU
+MIN_IOU = 0.9
+# Trimmed receipts count as the same crop when their sides differ by at most this fraction and their grayscale
+# thumbnails by at most this mean absolute difference
+MAX_CROP_SIZE_DIFF = 0.05
+MAX_CROP_PIXEL_DIFF = 20
+
+
+def quad_iou(contour_a, contour_b, image_shape):
+    # Rasterized, so non-convex quadrilaterals are handled too
+    masks = []
+    for contour in (contour_a, contour_b):
+        mask = np.zeros(image_shape[:2], dtype=np.uint8)
+        cv2.fillPoly(mask, [contour.reshape(4, 2).astype(np.int32)], 1)
+        masks.append(mask.astype(bool))
+    union = np.logical_or(*masks).sum()
+    return np.logical_and(*masks).sum() / union if union else 0.0
+
+
+def compare_contours(image, combinations, proxy_max_side):
+    full_pipeline = TrimPipeline(image, proxy_max_side=None)
+    proxy_pipeline = TrimPipeline(image, proxy_max_side=proxy_max_side)
+
+    start = time.perf_counter()
+    full_contours = [full_pipeline.find_candidate_contour(*combination) for combination in combinations]
+    full_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    proxy_contours = [proxy_pipeline.find_candidate_contour(*combination) for combination in combinations]
+    proxy_seconds = time.perf_counter() - start
+
+    matches = 0
+    for full_contour, proxy_contour in zip(full_contours, proxy_contours):
+        if full_contour is None or proxy_contour is None:
+            matches += full_contour is None and proxy_contour is None
+        else:
+            matches += quad_iou(full_contour, proxy_contour, image.shape) >= MIN_IOU
+
+    # Only plausible quadrilaterals reach the CNN; a full-resolution one is covered if the proxy finds it
+    # under any combination
+    full_candidates = [contour for contour in full_contours if is_candidate(contour, image.shape)]
+    proxy_candidates = [contour for contour in proxy_contours if is_candidate(contour, image.shape)]
+    covered = sum(any(quad_iou(full_contour, proxy_contour, image.shape) >= MIN_IOU
+                      for proxy_contour in proxy_candidates) for full_contour in full_candidates)
+    first_matches = bool(full_candidates) == bool(proxy_candidates) and (
+        not full_candidates or quad_iou(full_candidates[0], proxy_candidates[0], image.shape) >= MIN_IOU)
+
+    return {
+        "matches": matches,
+        "covered": covered,
+        "candidates": len(full_candidates),
+        "first_matches": first_matches,
+        "full_seconds": full_seconds,
+        "proxy_seconds": proxy_seconds
+    }
+
+
+def is_candidate(contour, image_shape):
+    return contour is not None and score_contour(contour, image_shape) >= TRIM_MIN_CONTOUR_SCORE
+
+
+def compare_trimming(image, combinations, cnn_model, proxy_max_side):
+    results = []
+    for max_side in (None, proxy_max_side):
+        stats = new_trimming_stats()
+        start = time.perf_counter()
+        trimmed_image, flag = perform_trimming(image, combinations, cnn_model, stats, proxy_max_side=max_side)
+        results.append((flag, trimmed_image, time.perf_counter() - start))
+    return results
+
+
+def crops_match(crop_a, crop_b):
+    (height_a, width_a), (height_b, width_b) = crop_a.shape[:2], crop_b.shape[:2]
+    if abs(height_a - height_b) > MAX_CROP_SIZE_DIFF * max(height_a, height_b) or \
+            abs(width_a - width_b) > MAX_CROP_SIZE_DIFF * max(width_a, width_b):
+        return False
+    thumbnails = [cv2.resize(cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY), (128, 256), interpolation=cv2.INTER_AREA)
+                  for crop in (crop_a, crop_b)]
+    return np.mean(cv2.absdiff(*thumbnails)) <= MAX_CROP_PIXEL_DIFF
+
+
+def main(images_folder=os.path.join('..', 'frontend', 'public', 'exampleReceipts'),
+         proxy_max_side=PROXY_MAX_SIDE, with_cnn=True):
+    """
+    Validates the downscaled contour search against full resolution on the labelled example receipts
+    (yoloTrainer/example_receipts_data.py), every one of which should be trimmed.
+
+    Reports, per receipt, for how many SEQUENCE_1 combinations the proxy quadrilateral matches the full-resolution
+    one (IoU >= MIN_IOU, or both missing), how many distinct plausible full-resolution candidates the proxy also
+    finds, and whether the first candidate - the first crop sent to the CNN - matches. With `with_cnn`,
+    perform_trimming is run end to end at both resolutions: trimming accuracy is the fraction of receipts trimmed,
+    and receipts trimmed at both resolutions are checked for the same crop.
+
+    Returns True only if the end-to-end comparison ran and the proxy trims at least as many receipts as full
+    resolution, each to the same crop - the condition for setting TRIM_PROXY_MAX_SIDE.
+    """
+    combinations = SEQUENCE_1["combination_list"]
+    filenames = [receipt[0] + ".jpg" for receipt in receipts_data
+                 if os.path.isfile(os.path.join(images_folder, receipt[0] + ".jpg"))]
+
+    cnn_model = None
+    if with_cnn:
+        from cnnTrimChecker.cnn_service.cnn_predict import load_cnn_model
+        cnn_model = load_cnn_model(SEQUENCE_1["model_name"])
+
+    totals = {"matches": 0, "covered": 0, "candidates": 0, "first_matches": 0, "full_seconds": 0.0,
+              "proxy_seconds": 0.0}
+    full_trimmed = 0
+    proxy_trimmed = 0
+    differing = []
+
+    for filename in filenames:
+        image = load_image(os.path.join(images_folder, filename))
+        result = compare_contours(image, combinations, proxy_max_side)
+        for name in totals:
+            totals[name] += result[name]
+        line = (f"{filename} {image.shape[1]}x{image.shape[0]}: contours matching {result['matches']}/"
+                f"{len(combinations)}, candidates covered {result['covered']}/{result['candidates']}, first "
+                f"candidate {'matches' if result['first_matches'] else 'differs'}, contour search "
+                f"{result['full_seconds']:.2f} s -> {result['proxy_seconds']:.2f} s")
+
+        if cnn_model is not None:
+            (full_flag, full_crop, full_trim_seconds), (proxy_flag, proxy_crop, proxy_trim_seconds) = \
+                compare_trimming(image, combinations, cnn_model, proxy_max_side)
+            full_trimmed += full_flag
+            proxy_trimmed += proxy_flag
+            same_crop = full_flag == proxy_flag and (not full_flag or crops_match(full_crop, proxy_crop))
+            if not same_crop:
+                differing.append(filename)
+            line += (f", trimming {full_flag} {full_crop.shape[1]}x{full_crop.shape[0]} ({full_trim_seconds:.2f} s)"
+                     f" -> {proxy_flag} {proxy_crop.shape[1]}x{proxy_crop.shape[0]} ({proxy_trim_seconds:.2f} s)"
+                     f"{'' if same_crop else ' DIFFERENT'}")
+        print(line)
+
+    print(f"\nProxy max side: {proxy_max_side}")
+    print(f"Matching contours: {totals['matches']}/{len(filenames) * len(combinations)}")
+    print(f"Covered candidates: {totals['covered']}/{totals['candidates']}")
+    print(f"Matching first candidates: {totals['first_matches']}/{len(filenames)}")
+    print(f"Contour search: {totals['full_seconds']:.2f} s -> {totals['proxy_seconds']:.2f} s")
+    if cnn_model is None:
+        print("End-to-end trimming not compared (--no-cnn), the proxy is not validated")
+        return False
+
+    print(f"Trimming accuracy: full resolution {full_trimmed}/{len(filenames)}, proxy {proxy_trimmed}/{len(filenames)}")
+    print(f"Different results: {len(differing)}/{len(filenames)} {differing}")
+    passed = proxy_trimmed >= full_trimmed and not differing
+    print(f"Proxy {proxy_max_side}: {'PASSED' if passed else 'FAILED'}")
+    return passed
+
+
+if __name__ == "__main__":
+    arguments = [argument for argument in sys.argv[1:] if argument != "--no-cnn"]
+    sys.exit(0 if main(proxy_max_side=int(arguments[0]) if arguments else PROXY_MAX_SIDE,
+                       with_cnn="--no-cnn" not in sys.argv) else 1)
@@ -2,12 +2,68 @@ import os
 
 MAIN_PATH = os.path.dirname(__file__)
 
+# Versions loaded at startup; POST /admin/models/{kind} swaps them at runtime
 BERT_MODEL_NAME = "0.9228"
+BERT_BACKEND = "tf"  # "tf" - TFAutoModelForSequenceClassification, "onnx" - ONNX Runtime on CPU
+BERT_MODEL_VARIANT = "fp32"  # ONNX backend only: "fp32" - model.onnx, "int8" - model.int8.onnx
 YOLO_MODEL = 'run_6_200_16_0.0015_yolov8m-obb.pt'
+# "pt" - PyTorch weights, "onnx" / "openvino" / "openvino_int8" - artifacts exported by yoloTrainer/yolo_train.py
+YOLO_BACKEND = "pt"
 
 PYTESSERACT_PATH = r"C:\Program Files\Tesseract-OCR\tesseract.exe" # r"/usr/bin/tesseract" - linux
 YOLO_PATH = os.path.join(MAIN_PATH, 'yoloTrainer', 'yolo_training_runs', YOLO_MODEL, 'weights', 'best.pt')
 
+# /admin endpoints (model hot-swap) require the X-Admin-Token header with this value; unset - they are disabled
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN")
+
+# Models are loaded in parallel in the background; models listed in LAZY_MODELS ("bert", "phrase_index", "cnn",
+# "yolo") are loaded on first use instead of at startup
+MODEL_LOADER_WORKERS = 4
+LAZY_MODELS = []
+
+# Executors - threads for GIL-releasing inference (TF, YOLO, OpenCV), processes for Tesseract
+INFERENCE_THREAD_WORKERS = 4
+OCR_PROCESS_WORKERS = 5
+# Tesseract calls (one per receipt field) in flight across all /fast-api/perform-ocr requests; fields of one
+# receipt are read in parallel, so it takes about as long as its slowest field
+OCR_MAX_CONCURRENCY = 5
+
+# Micro-batching of /fast-api/get-category requests
+BERT_BATCH_MAX_SIZE = 32
+BERT_BATCH_MAX_WAIT_MS = 5
+
+# Micro-batching of YOLO detection across concurrent /fast-api/perform-ocr requests
+YOLO_BATCH_MAX_SIZE = 4
+YOLO_BATCH_MAX_WAIT_MS = 20
+
+# In-process cache of title -> softmax vector, None = entries never expire
+BERT_CACHE_MAX_SIZE = 10000
+BERT_CACHE_TTL_SECONDS = None
+
+# Persistent cache shared by workers, stored in bertTrainer/bert_model/<BERT_MODEL_NAME>/
+BERT_STORE_ENABLED = True
+BERT_STORE_FILE_NAME = "prediction_cache.sqlite"
+BERT_STORE_WARMUP_SIZE = 5000
+
+# Nearest-neighbour fast path over bertTrainer/bert_data phrases (hashed char n-grams, cosine similarity)
+BERT_INDEX_ENABLED = True
+BERT_INDEX_NGRAM_SIZES = (2, 3, 4)
+BERT_INDEX_DIMENSIONS = 1024
+BERT_INDEX_THRESHOLD = 0.9
+BERT_INDEX_MIN_MARGIN = 0.05
+BERT_INDEX_TEMPERATURE = 0.05  # softmax temperature turning per-category similarities into scores
+
+# /fast-api/get-categories - number of titles per forward pass
+BERT_BULK_CHUNK_SIZE = 64
+
+# /fast-api/metrics - histogram buckets of CNN calls per trimmed receipt, seconds of trimming without a positive
+# crop and paper ratio of uploads (see TRIM_MIN_PAPER_RATIO in cnnTrimChecker/cnn_config.py)
+TRIM_CNN_CALL_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+TRIM_SECONDS_BUCKETS = (0.1, 0.25, 0.5, 1, 2, 4, 8, 16)
+TRIM_PAPER_RATIO_BUCKETS = (0.01, 0.03, 0.05, 0.1, 0.2, 0.3, 0.5)
+# /fast-api/metrics - seconds of OCR per receipt (all fields) and per field
+OCR_SECONDS_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 4)
+
 OTHER_SERVICES_ADRESSES = [
     "http://localhost:3000",
     "http://localhost:8000",
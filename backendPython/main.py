@@ -1,20 +1,44 @@
+import asyncio
 import base64
+import os
+import secrets
+import time
+from typing import List, Optional
 
 import numpy as np
 from pydantic import BaseModel
 from starlette.middleware.cors import CORSMiddleware
-from fastapi import FastAPI, File, HTTPException, UploadFile
-import cv2
-import pytesseract
+from fastapi import Depends, FastAPI, File, Header, HTTPException, UploadFile
+from fastapi.responses import JSONResponse
 
-from ultralytics import YOLO
+from services.batcher import PredictionBatcher
+from services.bert_predict import load_model_and_tokenizer, load_label_encoder, predict_probabilities, select_top_k
+from services.executors import start_executors, shutdown_executors, run_in_thread, run_in_process
+from services import metrics
+from services.lazy_import import lazy_import, import_seconds
+from services.model_loader import ModelLoader, ModelUnavailableError
+from services.model_registry import get_yolo_weights_path, list_models
 
-from cnnTrimChecker.cnn_service.cnn_predict import load_cnn_model
-from services.bert_predict import load_model_and_tokenizer, predict_top_k
+from config import BERT_MODEL_NAME, BERT_BACKEND, BERT_MODEL_VARIANT, YOLO_MODEL, OTHER_SERVICES_ADRESSES, \
+    BERT_BATCH_MAX_SIZE, BERT_BATCH_MAX_WAIT_MS, BERT_BULK_CHUNK_SIZE, INFERENCE_THREAD_WORKERS, OCR_PROCESS_WORKERS, \
+    BERT_CACHE_MAX_SIZE, BERT_CACHE_TTL_SECONDS, BERT_STORE_ENABLED, BERT_STORE_FILE_NAME, BERT_STORE_WARMUP_SIZE, \
+    BERT_INDEX_ENABLED, BERT_INDEX_NGRAM_SIZES, BERT_INDEX_DIMENSIONS, BERT_INDEX_THRESHOLD, BERT_INDEX_MIN_MARGIN, \
+    BERT_INDEX_TEMPERATURE, MODEL_LOADER_WORKERS, LAZY_MODELS, TRIM_CNN_CALL_BUCKETS, \
+    TRIM_SECONDS_BUCKETS, TRIM_PAPER_RATIO_BUCKETS, YOLO_BATCH_MAX_SIZE, YOLO_BATCH_MAX_WAIT_MS, OCR_MAX_CONCURRENCY, \
+    OCR_SECONDS_BUCKETS, ADMIN_TOKEN
+from bertTrainer.bert_config import BERT_MODEL_PATH
+from yoloTrainer.yolo_config import CLASS_NAMES
+from services.prediction_cache import PredictionCache
+from services.prediction_store import PredictionStore
+from services.phrase_index import build_phrase_index
+from services.yolo_service.ocr_worker import init_ocr_worker
 
-from config import BERT_MODEL_NAME, YOLO_PATH, OTHER_SERVICES_ADRESSES, PYTESSERACT_PATH
-from services.image_ocr import predict_image
-from services.receipt_trimmer import perform_trimming
+# Receipt subsystems (OpenCV, TensorFlow/Keras, Ultralytics, Tesseract) are imported on first use, so a worker that
+# only categorizes titles never pays for them
+cnn_predict = lazy_import("cnnTrimChecker.cnn_service.cnn_predict")
+receipt_trimmer = lazy_import("services.receipt_trimmer")
+image_ocr = lazy_import("services.image_ocr")
+ocr = lazy_import("services.yolo_service.ocr")
 
 app = FastAPI()
 
@@ -26,14 +50,14 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-from cnnTrimChecker.cnn_config import SEQUENCE_1
+from cnnTrimChecker.cnn_config import SEQUENCE_1, TRIM_SEQUENCES
 trim_sequence = SEQUENCE_1
 
-model = None
-tokenizer = None
-label_encoder = None
-cnn_model = None
-yolo_model = None
+category_batcher = None
+yolo_batcher = None
+ocr_semaphore = None
+category_cache = PredictionCache(BERT_CACHE_MAX_SIZE, BERT_CACHE_TTL_SECONDS)
+prediction_stores = {}
 
 
 class CategoryRequest(BaseModel):
@@ -41,13 +65,201 @@ class CategoryRequest(BaseModel):
     k: int
 
 
+class ModelSwapRequest(BaseModel):
+    version: str
+
+
+def load_phrase_index(version):
+    label_encoder = load_label_encoder(version)
+    return build_phrase_index(label_encoder, BERT_INDEX_NGRAM_SIZES, BERT_INDEX_DIMENSIONS, BERT_INDEX_THRESHOLD,
+                              BERT_INDEX_MIN_MARGIN, BERT_INDEX_TEMPERATURE)
+
+
+def load_cnn(version):
+    sequence = next((sequence for sequence in TRIM_SEQUENCES if sequence["model_name"] == version), trim_sequence)
+    return cnn_predict.load_cnn_model(version), sequence["combination_list"]
+
+
+def warm_up_bert(bert):
+    model, tokenizer, _ = bert
+    predict_probabilities(["warm up"], model, tokenizer)
+
+
+def warm_up_cnn(cnn):
+    model, _ = cnn
+    cnn_predict.check_trimmed_image_rotations([np.zeros((64, 64, 3), dtype=np.uint8)], model)
+
+
+def warm_up_yolo(model):
+    image_ocr.detect_fields(np.zeros((640, 640, 3), dtype=np.uint8), model)
+
+
+def on_model_activate(name, version, value):
+    if name == "bert":
+        category_cache.set_model(version)
+        if BERT_STORE_ENABLED and version not in prediction_stores:
+            store = PredictionStore(os.path.join(BERT_MODEL_PATH, version, BERT_STORE_FILE_NAME), version)
+            for title, probabilities in store.hottest(BERT_STORE_WARMUP_SIZE):
+                category_cache.put(version, title, probabilities)
+            prediction_stores[version] = store
+    print(f"Model {name} {version} is active")
+
+
+def on_model_release(name, version, value):
+    # A version swapped away and back (A -> B -> A) while still draining is active again and keeps its store
+    if name == "bert" and model_loader.versions.get(name) != version:
+        store = prediction_stores.pop(version, None)
+        if store is not None:
+            store.close()
+    print(f"Model {name} {version} released")
+
+
+model_loader = ModelLoader(MODEL_LOADER_WORKERS, on_activate=on_model_activate, on_release=on_model_release)
+model_loader.register("bert", lambda version: load_model_and_tokenizer(version, BERT_BACKEND, BERT_MODEL_VARIANT),
+                      BERT_MODEL_NAME, lazy="bert" in LAZY_MODELS, warmup_fn=warm_up_bert)
+if BERT_INDEX_ENABLED:
+    model_loader.register("phrase_index", load_phrase_index, BERT_MODEL_NAME, lazy="phrase_index" in LAZY_MODELS,
+                          optional=True)
+model_loader.register("cnn", load_cnn, trim_sequence["model_name"], lazy="cnn" in LAZY_MODELS,
+                      warmup_fn=warm_up_cnn)
+model_loader.register("yolo", lambda version: image_ocr.load_model(get_yolo_weights_path(version)), YOLO_MODEL,
+                      lazy="yolo" in LAZY_MODELS, warmup_fn=warm_up_yolo)
+
+
 @app.on_event("startup")
 async def startup_event():
-    global model, tokenizer, label_encoder, cnn_model, trim_sequence, yolo_model
-    model, tokenizer, label_encoder = load_model_and_tokenizer(BERT_MODEL_NAME)
-    cnn_model = load_cnn_model(trim_sequence["model_name"])
-    yolo_model = YOLO(YOLO_PATH)
-    pytesseract.pytesseract.tesseract_cmd = PYTESSERACT_PATH
+    global category_batcher, yolo_batcher, ocr_semaphore
+    start_executors(INFERENCE_THREAD_WORKERS, OCR_PROCESS_WORKERS, process_initializer=init_ocr_worker)
+
+    model_loader.start()
+
+    category_batcher = PredictionBatcher(predict_categories, BERT_BATCH_MAX_SIZE, BERT_BATCH_MAX_WAIT_MS,
+                                         runner=run_in_thread, metrics_name="bert")
+    category_batcher.start()
+
+    yolo_batcher = PredictionBatcher(detect_receipt_fields, YOLO_BATCH_MAX_SIZE, YOLO_BATCH_MAX_WAIT_MS,
+                                     runner=run_in_thread, metrics_name="yolo")
+    yolo_batcher.start()
+
+    ocr_semaphore = asyncio.Semaphore(OCR_MAX_CONCURRENCY)
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await category_batcher.stop()
+    await yolo_batcher.stop()
+    shutdown_executors()
+    model_loader.shutdown()
+    for store in prediction_stores.values():
+        store.close()
+
+
+@app.exception_handler(ModelUnavailableError)
+async def model_unavailable_handler(request, exc):
+    return JSONResponse(status_code=503, content={"detail": str(exc)})
+
+
+@app.get("/health/live")
+async def health_live():
+    """
+    Zwraca {"status": "ok"}, jeśli proces serwisu działa (niezależnie od stanu modeli).
+    """
+    return {"status": "ok"}
+
+
+@app.get("/health/ready")
+async def health_ready():
+    """
+    Zwraca (kod 200, jeśli wszystkie wymagane modele ładowane przy starcie są gotowe, w przeciwnym razie 503;
+    modele opcjonalne, jak indeks fraz, nie wpływają na gotowość):
+    {
+      "ready": bool - Czy serwis jest gotowy do obsługi zapytań,
+      "models": {
+        "<nazwa modelu>": {
+          "status": str - "not_loaded", "loading", "ready" lub "failed",
+          "lazy": bool - Czy model jest ładowany dopiero przy pierwszym użyciu,
+          "optional": bool - Czy serwis działa bez tego modelu (np. indeks fraz),
+          "load_seconds": float lub null - Czas ładowania modelu,
+          "error": str lub null - Błąd ładowania modelu.
+        },
+        ...
+      }
+    }
+    """
+    ready = model_loader.is_ready()
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={
+            "ready": ready,
+            "models": model_loader.status()
+        }
+    )
+
+
+def predict_categories(items):
+    # Items are (bert model version, title) pairs; titles queued during a swap are predicted by their own version
+    results = [None] * len(items)
+    groups = {}
+    for i, (bert, _) in enumerate(items):
+        groups.setdefault(id(bert), (bert, []))[1].append(i)
+
+    for bert, indices in groups.values():
+        model, tokenizer, _ = bert.value
+        probabilities = predict_probabilities([items[i][1] for i in indices], model, tokenizer)
+        for i, row in zip(indices, probabilities):
+            results[i] = row
+    return results
+
+
+def detect_receipt_fields(items):
+    # Items are (yolo model version, trimmed image) pairs, grouped per version like predict_categories
+    results = [None] * len(items)
+    groups = {}
+    for i, (yolo, _) in enumerate(items):
+        groups.setdefault(id(yolo), (yolo, []))[1].append(i)
+
+    for yolo, indices in groups.values():
+        detections = image_ocr.detect_fields_batch([items[i][1] for i in indices], yolo.value)
+        for i, fields in zip(indices, detections):
+            results[i] = fields
+    return results
+
+
+def find_known_probabilities(version, titles, probabilities):
+    # Fills the gaps in `probabilities` from the SQLite store and the phrase index; runs in the inference thread
+    # pool, as both are blocking
+    missing = [i for i, row in enumerate(probabilities) if row is None]
+    prediction_store = prediction_stores.get(version)
+    if prediction_store is not None:
+        for i, row in zip(missing, prediction_store.get_many([titles[i] for i in missing])):
+            if row is not None:
+                probabilities[i] = row
+                category_cache.put(version, titles[i], row)
+        missing = [i for i in missing if probabilities[i] is None]
+
+    phrase_index = model_loader.peek("phrase_index", version)
+    if missing and phrase_index is not None:
+        for i, row in zip(missing, phrase_index.lookup_many([titles[i] for i in missing])):
+            probabilities[i] = row
+    return probabilities
+
+
+async def get_known_probabilities(version, titles):
+    probabilities = [category_cache.get(version, title) for title in titles]
+    prediction_store = prediction_stores.get(version)
+    if prediction_store is not None:
+        prediction_store.count_hits([title for title, row in zip(titles, probabilities) if row is not None])
+
+    if any(row is None for row in probabilities):
+        probabilities = await run_in_thread(find_known_probabilities, version, titles, probabilities)
+    return probabilities
+
+
+def cache_probabilities(version, title, probabilities):
+    category_cache.put(version, title, probabilities)
+    prediction_store = prediction_stores.get(version)
+    if prediction_store is not None:
+        prediction_store.put(title, probabilities)
 
 
 @app.post("/fast-api/get-category")
@@ -70,15 +282,104 @@ async def get_category(data: CategoryRequest):
     title = data.title
     k = data.k
 
-    predicted_categories = predict_top_k(title, model, tokenizer, label_encoder, k=k)
+    async with model_loader.use("bert") as bert:
+        _, _, label_encoder = bert.value
+
+        probabilities = (await get_known_probabilities(bert.version, [title]))[0]
+        if probabilities is None:
+            probabilities = await category_batcher.submit((bert, title))
+            cache_probabilities(bert.version, title, probabilities)
+
+        predicted_categories = select_top_k([probabilities], [k], label_encoder)[0]
+
+    return format_categories(predicted_categories)
+
+
+@app.post("/fast-api/get-categories")
+async def get_categories(data: List[CategoryRequest]):
+    """
+    Przyjmuje:
+    [
+      {
+        "title": str - Tytuł tekstu, na podstawie którego będą przewidywane kategorie,
+        "k": int - Liczba najlepszych kategorii do zwrócenia.
+      },
+      ...
+    ]
+    Zwraca listę odpowiedzi w tej samej kolejności co zapytania, każda w formacie /fast-api/get-category:
+    [
+      {
+        "category_1": {
+          "category": str - Nazwa kategorii,
+          "score": float - Prawdopodobieństwo przewidzianej kategorii.
+        },
+        ...
+      },
+      ...
+    ]
+    """
+    if not data:
+        return []
+
+    titles = [item.title for item in data]
+    k_list = [item.k for item in data]
+
+    async with model_loader.use("bert") as bert:
+        model, tokenizer, label_encoder = bert.value
+
+        probabilities = await get_known_probabilities(bert.version, titles)
+        missing = [i for i, row in enumerate(probabilities) if row is None]
+
+        if missing:
+            missing_titles = [titles[i] for i in missing]
+            predicted = await run_in_thread(predict_probabilities, missing_titles, model, tokenizer,
+                                            max_chunk_size=BERT_BULK_CHUNK_SIZE)
+            for i, row in zip(missing, predicted):
+                probabilities[i] = row
+                cache_probabilities(bert.version, titles[i], row)
+
+        predicted_categories = select_top_k(probabilities, k_list, label_encoder)
+
+    return [format_categories(categories) for categories in predicted_categories]
+
+
+@app.get("/fast-api/metrics")
+async def get_metrics():
+    """
+    Zwraca statystyki działania serwisu:
+    {
+      "category_cache": dict - Rozmiar, trafienia i chybienia cache'u kategorii,
+      "prediction_store": dict lub null - Trafienia i chybienia trwałego cache'u kategorii (SQLite),
+      "phrase_index": dict lub null - Liczba zapytań i trafień indeksu fraz (bez uruchamiania modelu BERT),
+      "import_seconds": dict - Czas pierwszego importu leniwie ładowanych modułów,
+      "service": {
+        "counters": dict - Liczniki, m.in. przyciętych paragonów, kombinacji pominiętych przed CNN (trim_*),
+                           obrazów odrzuconych przed przycinaniem (trim_rejected_early) i szacowanego
+                           zaoszczędzonego czasu w sekundach (trim_early_reject_seconds_saved),
+        "histograms": dict - Histogramy, m.in. liczby wywołań CNN na paragon (trim_cnn_calls_per_receipt) oraz
+                             rozmiaru partii, czasu oczekiwania w kolejce i opóźnienia zapytań BERT i YOLO
+                             (bert_*, yolo_*: batch_size, wait_seconds, latency_seconds).
+      }
+    }
+    """
+    phrase_index = model_loader.peek("phrase_index", load=False)
+    prediction_store = prediction_stores.get(category_cache.model_name)
+    return {
+        "category_cache": category_cache.stats(),
+        "prediction_store": prediction_store.stats() if prediction_store is not None else None,
+        "phrase_index": phrase_index.stats() if phrase_index is not None else None,
+        "import_seconds": import_seconds,
+        "service": metrics.snapshot()
+    }
+
 
+def format_categories(predicted_categories):
     response = {}
     for i, (category, score) in enumerate(predicted_categories, 1):
         response[f"category_{i}"] = {
             "category": category,
             "score": float(score)
         }
-
     return response
 
 
@@ -96,43 +397,177 @@ async def process_receipt(file: UploadFile = File(...)):
         "trimmed_image": str - Przycięty obraz oryginalnego pliku zakodowany w formacie base64.
     }
     """
-    try:
-        file_bytes = np.asarray(bytearray(await file.read()), dtype=np.uint8)
-        image = cv2.imdecode(file_bytes, cv2.IMREAD_COLOR)
+    async with model_loader.use("cnn") as cnn:
+        cnn_model, combination_list = cnn.value
+
+        try:
+            image = await run_in_thread(decode_image, await file.read())
+
+            if image is None:
+                raise HTTPException(status_code=400, detail="Invalid image format")
+
+            trim_stats = receipt_trimmer.new_trimming_stats()
+            trimmed_image, flag = await run_in_thread(trim_image, image, combination_list, cnn_model, trim_stats)
+            record_trimming_metrics(trim_stats, flag)
+
+            if flag:
+                async with model_loader.use("yolo") as yolo:
+                    crops, yolo_image = await yolo_batcher.submit((yolo, trimmed_image))
+                ocr_data = await read_receipt_fields(crops) if crops is not None else None
+
+                yolo_base64 = await run_in_thread(encode_image, yolo_image)
+                trimmed_base64 = await run_in_thread(encode_image, trimmed_image)
+                return {
+                    "ocr_data": ocr_data,
+                    "yolo_image": yolo_base64,
+                    "trimmed_image": trimmed_base64
+                }
+            else:
+                original_base64 = await run_in_thread(encode_image, image)
+                return {
+                    "ocr_data": None,
+                    "yolo_image": None,
+                    "trimmed_image": original_base64
+                }
+
+        except (HTTPException, ModelUnavailableError):
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error processing image: {str(e)}")
+
+
+def require_admin_token(x_admin_token: Optional[str] = Header(None)):
+    if ADMIN_TOKEN is None:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled, set ADMIN_TOKEN to enable them")
+    if x_admin_token is None or not secrets.compare_digest(x_admin_token.encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+
+@app.get("/admin/models", dependencies=[Depends(require_admin_token)])
+async def get_models():
+    """
+    Wymaga nagłówka X-Admin-Token zgodnego z ADMIN_TOKEN (401 przy błędnym tokenie, 403 gdy ADMIN_TOKEN nie jest
+    ustawiony).
+    Zwraca:
+    {
+      "available": {
+        "bert": list - Wersje modeli BERT w bertTrainer/bert_model,
+        "cnn": list - Wersje modeli CNN w cnnTrimChecker/cnn_model,
+        "yolo": list - Przebiegi treningowe YOLO w yoloTrainer/yolo_training_runs
+      },
+      "models": dict - Stan modeli w formacie /health/ready, z aktywną wersją ("version"), liczbą obsługiwanych
+                       zapytań ("in_flight"), wczytywaną wersją ("pending_version"), wersjami kończącymi obsługę
+                       zapytań ("draining_versions") i błędem ostatniej podmiany ("swap_error").
+    }
+    """
+    return {
+        "available": await run_in_thread(list_models),
+        "models": model_loader.status()
+    }
+
+
+@app.post("/admin/models/{kind}", status_code=202, dependencies=[Depends(require_admin_token)])
+async def swap_model(kind: str, data: ModelSwapRequest):
+    """
+    Przyjmuje:
+    {
+      "version": str - Wersja modelu z listy "available" zwracanej przez /admin/models.
+    }
+    Wymaga nagłówka X-Admin-Token jak /admin/models.
+    Wczytuje i rozgrzewa nową wersję modelu ("bert", "cnn" lub "yolo") w tle, po czym podmienia ją bez restartu
+    serwisu. Zapytania obsługiwane przez starą wersję kończą się na niej, a jej pamięć jest zwalniana po ich
+    zakończeniu. Podmiana modelu BERT przebudowuje też indeks fraz.
+    Zwraca (kod 202):
+    {
+      "kind": str - Rodzaj modelu,
+      "version": str - Wczytywana wersja modelu,
+      "status": "loading"
+    }
+    """
+    available = await run_in_thread(list_models)
+    if kind not in available:
+        raise HTTPException(status_code=404, detail=f"Unknown model kind: {kind}")
+    if data.version not in available[kind]:
+        raise HTTPException(status_code=404, detail=f"Unknown {kind} model version: {data.version}")
+
+    names = [kind, "phrase_index"] if kind == "bert" and BERT_INDEX_ENABLED else [kind]
+    if any(name in model_loader.pending for name in names):
+        raise HTTPException(status_code=409, detail=f"A {kind} model swap is already in progress")
+    for name in names:
+        model_loader.swap(name, data.version)
+
+    return {
+        "kind": kind,
+        "version": data.version,
+        "status": "loading"
+    }
+
+
+async def read_field(cropped_area, class_name):
+    async with ocr_semaphore:
+        start = time.perf_counter()
+        text = await run_in_process(ocr.read_field, cropped_area, class_name)
+    metrics.observe("ocr_field_seconds", time.perf_counter() - start, OCR_SECONDS_BUCKETS)
+    return text
+
+
+async def read_receipt_fields(crops):
+    # Every field is a separate Tesseract call in the process pool; concurrent receipts share OCR_MAX_CONCURRENCY
+    start = time.perf_counter()
+    texts = await asyncio.gather(*(read_field(cropped_area, class_name) for class_name, cropped_area in crops.items()))
+    metrics.observe("ocr_receipt_seconds", time.perf_counter() - start, OCR_SECONDS_BUCKETS)
+
+    ocr_data = {class_name: "" for class_name in CLASS_NAMES}
+    ocr_data.update(zip(crops, texts))
+    return ocr_data
+
+
+def trim_image(image, combination_list, cnn_model, trim_stats):
+    start = time.perf_counter()
+    result = receipt_trimmer.perform_trimming(image, combination_list, cnn_model, trim_stats)
+    trim_stats["seconds"] = time.perf_counter() - start
+    return result
+
+
+def record_trimming_metrics(trim_stats, flag):
+    metrics.increment("trim_receipts")
+    metrics.increment("trim_positive" if flag else "trim_negative")
+    for name, value in trim_stats.items():
+        if name not in ("paper_ratio", "seconds"):
+            metrics.increment(f"trim_{name}", value)
+    metrics.observe("trim_cnn_calls_per_receipt", trim_stats["cnn_calls"], TRIM_CNN_CALL_BUCKETS)
+    if trim_stats["paper_ratio"] is not None:
+        metrics.observe("trim_paper_ratio", trim_stats["paper_ratio"], TRIM_PAPER_RATIO_BUCKETS)
+
+    if trim_stats["rejected_early"]:
+        # Estimated as the mean time of uploads that went through every combination without a positive crop
+        negative_seconds = metrics.mean("trim_negative_seconds")
+        if negative_seconds is not None:
+            metrics.increment("trim_early_reject_seconds_saved", max(0.0, negative_seconds - trim_stats["seconds"]))
+    elif not flag:
+        metrics.observe("trim_negative_seconds", trim_stats["seconds"], TRIM_SECONDS_BUCKETS)
+
 
-        if image is None:
-            raise HTTPException(status_code=400, detail="Invalid image format")
+def decode_image(raw_bytes):
+    import cv2
 
-        if len(image.shape) == 2 or (len(image.shape) == 3 and image.shape[2] == 1):
-            image = cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+    file_bytes = np.asarray(bytearray(raw_bytes), dtype=np.uint8)
+    image = cv2.imdecode(file_bytes, cv2.IMREAD_COLOR)
 
-        if len(image.shape) == 3 and image.shape[2] != 3:
-            image = cv2.cvtColor(image, cv2.COLOR_RGBA2BGR if image.shape[2] == 4 else cv2.COLOR_BGRA2BGR)
+    if image is None:
+        return None
 
-        trimmed_image, flag = perform_trimming(image, trim_sequence["combination_list"], cnn_model)
+    if len(image.shape) == 2 or (len(image.shape) == 3 and image.shape[2] == 1):
+        image = cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
 
-        if flag:
+    if len(image.shape) == 3 and image.shape[2] != 3:
+        image = cv2.cvtColor(image, cv2.COLOR_RGBA2BGR if image.shape[2] == 4 else cv2.COLOR_BGRA2BGR)
 
-            ocr_data, yolo_image = predict_image(trimmed_image, yolo_model)
+    return image
 
-            _, yolo_buffer = cv2.imencode('.jpg', yolo_image)
-            _, trimmed_buffer = cv2.imencode('.jpg', trimmed_image)
 
-            yolo_base64 = base64.b64encode(yolo_buffer).decode('utf-8')
-            trimmed_base64 = base64.b64encode(trimmed_buffer).decode('utf-8')
-            return {
-                "ocr_data": ocr_data,
-                "yolo_image": yolo_base64,
-                "trimmed_image": trimmed_base64
-            }
-        else:
-            _, original_buffer = cv2.imencode('.jpg', image)
-            original_base64 = base64.b64encode(original_buffer).decode('utf-8')
-            return {
-                "ocr_data": None,
-                "yolo_image": None,
-                "trimmed_image": original_base64
-            }
+def encode_image(image):
+    import cv2
 
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error processing image: {str(e)}")
+    _, buffer = cv2.imencode('.jpg', image)
+    return base64.b64encode(buffer).decode('utf-8')
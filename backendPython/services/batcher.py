@@ -0,0 +1,102 @@
+import asyncio
+import time
+
+from services import metrics
+
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64)
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+
+
+class PredictionBatcher:
+    """
+    Coalesces concurrent single-item requests into one call of `predict_batch_fn`.
+
+    A batch is closed once it holds `max_batch_size` items or `max_wait_ms` has passed since its first
+    item arrived, whichever comes first. `predict_batch_fn` receives the list of items and must return
+    a list of results in the same order. When `runner` is given, `predict_batch_fn` is awaited through it
+    (e.g. `run_in_thread`) instead of being called on the event loop.
+
+    With `metrics_name` set, batch sizes, the time items wait in the queue and their end-to-end latency are
+    recorded as `<metrics_name>_batch_size`, `<metrics_name>_wait_seconds` and `<metrics_name>_latency_seconds`
+    histograms in `services.metrics`.
+    """
+
+    def __init__(self, predict_batch_fn, max_batch_size, max_wait_ms, runner=None, metrics_name=None,
+                 size_buckets=BATCH_SIZE_BUCKETS, seconds_buckets=SECONDS_BUCKETS):
+        self.predict_batch_fn = predict_batch_fn
+        self.runner = runner
+        self.metrics_name = metrics_name
+        self.size_buckets = size_buckets
+        self.seconds_buckets = seconds_buckets
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.queue = None
+        self.worker = None
+
+    def start(self):
+        self.queue = asyncio.Queue()
+        self.worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self.worker is not None:
+            self.worker.cancel()
+            try:
+                await self.worker
+            except asyncio.CancelledError:
+                pass
+            self.worker = None
+
+    async def submit(self, item):
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((item, future, time.perf_counter()))
+        return await future
+
+    async def _collect_batch(self):
+        batch = [await self.queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            if not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+                continue
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._collect_batch()
+            items = [item for item, _, _ in batch]
+            futures = [future for _, future, _ in batch]
+            started_at = time.perf_counter()
+
+            try:
+                if self.runner is not None:
+                    results = await self.runner(self.predict_batch_fn, items)
+                else:
+                    results = self.predict_batch_fn(items)
+            except Exception as e:
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            for future, result in zip(futures, results):
+                if not future.done():
+                    future.set_result(result)
+
+            if self.metrics_name is not None:
+                self._record_metrics(batch, started_at)
+
+    def _record_metrics(self, batch, started_at):
+        finished_at = time.perf_counter()
+        metrics.observe(f"{self.metrics_name}_batch_size", len(batch), self.size_buckets)
+        for _, _, submitted_at in batch:
+            metrics.observe(f"{self.metrics_name}_wait_seconds", started_at - submitted_at, self.seconds_buckets)
+            metrics.observe(f"{self.metrics_name}_latency_seconds", finished_at - submitted_at, self.seconds_buckets)
@@ -1,38 +1,118 @@
+import bisect
 import os
 import pickle
-import tensorflow as tf
-from transformers import AutoTokenizer, TFAutoModelForSequenceClassification
+from types import SimpleNamespace
 
-from bertTrainer.bert_config import BERT_MODEL_PATH
+import numpy as np
 
+from bertTrainer.bert_config import BERT_MODEL_PATH, BERT_MAX_LENGTH, BERT_LENGTH_BUCKETS, BERT_ONNX_MODEL_FILES
 
-def load_model_and_tokenizer(accuracy):
 
-    model = TFAutoModelForSequenceClassification.from_pretrained(os.path.join(BERT_MODEL_PATH, accuracy, "model"))
+class OnnxSequenceClassifier:
+    """Runs an exported ONNX graph through ONNX Runtime, callable like the TF model: model(**inputs).logits."""
+
+    def __init__(self, model_path):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self.input_names = [model_input.name for model_input in self.session.get_inputs()]
+
+    def __call__(self, **inputs):
+        feed = {name: np.asarray(inputs[name], dtype=np.int32) for name in self.input_names}
+        logits = self.session.run(None, feed)[0]
+        return SimpleNamespace(logits=logits)
+
+
+def load_model_and_tokenizer(accuracy, backend="tf", variant="fp32"):
+    from transformers import AutoTokenizer
+
+    if backend == "tf":
+        from transformers import TFAutoModelForSequenceClassification
+        model = TFAutoModelForSequenceClassification.from_pretrained(os.path.join(BERT_MODEL_PATH, accuracy, "model"))
+    elif backend == "onnx":
+        if variant not in BERT_ONNX_MODEL_FILES:
+            raise ValueError(f"Unknown ONNX model variant: {variant}")
+        model = OnnxSequenceClassifier(os.path.join(BERT_MODEL_PATH, accuracy, BERT_ONNX_MODEL_FILES[variant]))
+    else:
+        raise ValueError(f"Unknown BERT backend: {backend}")
 
     tokenizer = AutoTokenizer.from_pretrained(os.path.join(BERT_MODEL_PATH, accuracy, "tokenizer"))
 
-    with open(os.path.join(BERT_MODEL_PATH, accuracy, "encoder"), 'rb') as f:
-        label_encoder = pickle.load(f)
+    label_encoder = load_label_encoder(accuracy)
 
     return model, tokenizer, label_encoder
 
 
-def predict_top_k(text, model, tokenizer, label_encoder, k):
-    inputs = tokenizer(
-        text,
-        padding=True,
-        truncation=True,
-        max_length=128,
-        return_tensors="tf"
-    )
+def load_label_encoder(accuracy):
+    with open(os.path.join(BERT_MODEL_PATH, accuracy, "encoder"), 'rb') as f:
+        return pickle.load(f)
+
+
+def softmax(logits):
+    exp = np.exp(logits - logits.max(axis=-1, keepdims=True))
+    return exp / exp.sum(axis=-1, keepdims=True)
+
+
+def select_top_k(probabilities, k_list, label_encoder):
+    probabilities = np.vstack(probabilities)
+    k_list = np.clip(np.asarray(k_list, dtype=np.int64), 0, probabilities.shape[1])
+    k_max = int(k_list.max()) if len(k_list) else 0
+    if k_max == 0:
+        return [[] for _ in k_list]
+
+    top_indices = np.argpartition(-probabilities, k_max - 1, axis=1)[:, :k_max]
+    top_scores = np.take_along_axis(probabilities, top_indices, axis=1)
+
+    order = np.argsort(-top_scores, axis=1, kind="stable")
+    top_indices = np.take_along_axis(top_indices, order, axis=1)
+    top_scores = np.round(np.take_along_axis(top_scores, order, axis=1).astype(np.float64), 3).tolist()
+    top_labels = label_encoder.classes_[top_indices].tolist()
+
+    return [list(zip(labels[:k], scores[:k])) for labels, scores, k in zip(top_labels, top_scores, k_list)]
+
+
+def split_into_buckets(lengths, max_chunk_size=None):
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i])
+
+    chunks = []
+    chunk = []
+    chunk_bucket = None
+    for i in order:
+        bucket = bisect.bisect_left(BERT_LENGTH_BUCKETS, lengths[i])
+        if chunk and (bucket != chunk_bucket or len(chunk) == max_chunk_size):
+            chunks.append(chunk)
+            chunk = []
+        chunk.append(i)
+        chunk_bucket = bucket
+
+    if chunk:
+        chunks.append(chunk)
+    return chunks
+
+
+def predict_logits(texts, model, tokenizer, max_chunk_size=None):
+    encoded = tokenizer(texts, truncation=True, max_length=BERT_MAX_LENGTH)
+    lengths = [len(input_ids) for input_ids in encoded["input_ids"]]
+
+    logits = None
+    for chunk in split_into_buckets(lengths, max_chunk_size):
+        inputs = tokenizer.pad(
+            {key: [encoded[key][i] for i in chunk] for key in encoded.keys()},
+            padding="longest",
+            return_tensors="np"
+        )
+
+        chunk_logits = np.asarray(model(**inputs).logits)
+
+        if logits is None:
+            logits = np.empty((len(texts), chunk_logits.shape[1]), dtype=chunk_logits.dtype)
+        logits[chunk] = chunk_logits
+
+    return logits
 
-    logits = model(**inputs).logits
-    probabilities = tf.nn.softmax(logits, axis=-1).numpy()[0]
 
-    top_k_values, top_k_indices = tf.nn.top_k(logits, k=k)
-    top_k_indices = top_k_indices.numpy()[0]
-    normalized_scores = probabilities[top_k_indices]
-    predicted_labels = label_encoder.inverse_transform(top_k_indices)
+def predict_probabilities(texts, model, tokenizer, max_chunk_size=None):
+    return softmax(predict_logits(texts, model, tokenizer, max_chunk_size))
 
-    return list(zip(predicted_labels, [round(score, 3) for score in normalized_scores]))
\ No newline at end of file
@@ -0,0 +1,40 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from functools import partial
+
+thread_executor = None
+process_executor = None
+
+
+def start_executors(thread_workers, process_workers, process_initializer=None):
+    global thread_executor, process_executor
+    thread_executor = ThreadPoolExecutor(max_workers=thread_workers, thread_name_prefix="inference")
+    # "spawn" instead of "fork" - the parent process already runs TensorFlow and PyTorch threads
+    process_executor = ProcessPoolExecutor(
+        max_workers=process_workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=process_initializer
+    )
+
+
+def shutdown_executors():
+    global thread_executor, process_executor
+    if thread_executor is not None:
+        thread_executor.shutdown(wait=False, cancel_futures=True)
+        thread_executor = None
+    if process_executor is not None:
+        process_executor.shutdown(wait=False, cancel_futures=True)
+        process_executor = None
+
+
+async def run_in_thread(func, *args, **kwargs):
+    """For work that releases the GIL (TensorFlow, PyTorch, OpenCV)."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(thread_executor, partial(func, *args, **kwargs))
+
+
+async def run_in_process(func, *args, **kwargs):
+    """For work that holds the GIL or shells out (Tesseract). Arguments and results must be picklable."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(process_executor, partial(func, *args, **kwargs))
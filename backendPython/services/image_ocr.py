@@ -1,12 +1,16 @@
-from ultralytics import YOLO
 import cv2
 
-from services.yolo_service.ocr import perform_ocr_on_detections
-from services.yolo_service.yolo import predict, get_best_detections, draw_polygons
+from services.yolo_service.ocr import perform_ocr_on_crops, crop_detections
+from services.yolo_service.yolo import predict, predict_batch, get_best_detections, draw_polygons
 
 
 def load_model(model_path):
-    return YOLO(model_path)
+    from ultralytics import YOLO
+
+    # Exported models (ONNX, OpenVINO) do not store their task, so it is given explicitly
+    if model_path.endswith('.pt'):
+        return YOLO(model_path)
+    return YOLO(model_path, task='obb')
 
 
 def load_image(image_path):
@@ -16,14 +20,31 @@ def load_image(image_path):
     return image
 
 
-def predict_image(image, model):
-    results = predict(model, image)
+def detect_fields(image, model):
+    return process_detections(image, predict(model, image))
+
+
+def detect_fields_batch(images, model):
+    return [process_detections(image, [result]) for image, result in zip(images, predict_batch(model, images))]
+
+
+def process_detections(image, results):
     annotated_image = image.copy()
     best_detections = get_best_detections(results)
 
-    if not best_detections:
+    if len(best_detections) == 0:
         return None, None
 
     draw_polygons(annotated_image, best_detections)
-    ocr_results = perform_ocr_on_detections(image, best_detections)
+    crops = crop_detections(image, best_detections)
+    return crops, annotated_image
+
+
+def predict_image(image, model):
+    crops, annotated_image = detect_fields(image, model)
+
+    if crops is None:
+        return None, None
+
+    ocr_results = perform_ocr_on_crops(crops)
     return ocr_results, annotated_image
@@ -0,0 +1,31 @@
+import importlib
+import threading
+import time
+
+import_seconds = {}
+
+
+class LazyModule:
+    """Stands in for a module and imports it on first attribute access, recording how long the import took."""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    start = time.perf_counter()
+                    module = importlib.import_module(self._name)
+                    import_seconds[self._name] = time.perf_counter() - start
+                    self._module = module
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+
+def lazy_import(name):
+    return LazyModule(name)
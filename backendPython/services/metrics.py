@@ -0,0 +1,60 @@
+import bisect
+import threading
+
+lock = threading.Lock()
+counters = {}
+histograms = {}
+
+
+class Histogram:
+    """
+    Bucketed histogram: `counts[i]` is the number of observations in (`buckets[i - 1]`, `buckets[i]`], the last
+    count holds observations above the largest bucket.
+    """
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.total = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def snapshot(self):
+        labels = [f"<={bucket}" for bucket in self.buckets] + [f">{self.buckets[-1]}"]
+        return {
+            "count": self.count,
+            "sum": self.total,
+            "mean": self.total / self.count if self.count else 0.0,
+            "buckets": dict(zip(labels, self.counts))
+        }
+
+
+def increment(name, value=1):
+    with lock:
+        counters[name] = counters.get(name, 0) + value
+
+
+def observe(name, value, buckets):
+    with lock:
+        histogram = histograms.get(name)
+        if histogram is None:
+            histogram = histograms[name] = Histogram(buckets)
+        histogram.observe(value)
+
+
+def mean(name):
+    with lock:
+        histogram = histograms.get(name)
+        return histogram.total / histogram.count if histogram is not None and histogram.count else None
+
+
+def snapshot():
+    with lock:
+        return {
+            "counters": dict(counters),
+            "histograms": {name: histogram.snapshot() for name, histogram in histograms.items()}
+        }
@@ -0,0 +1,222 @@
+import asyncio
+import gc
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+
+
+class ModelUnavailableError(Exception):
+    def __init__(self, name, error):
+        super().__init__(f"Model '{name}' is unavailable: {str(error)}")
+        self.name = name
+        self.error = error
+
+
+class ModelVersion:
+    def __init__(self, name, version, future):
+        self.name = name
+        self.version = version
+        self.future = future
+        self.in_flight = 0
+        self.retired = False
+
+    @property
+    def value(self):
+        return self.future.result()
+
+
+class ModelLoader:
+    """
+    Loads registered models concurrently in background threads and hot-swaps their versions.
+
+    Eager models start loading on `start()`. Models registered with `lazy=True` start loading on the first
+    `use()` or `peek()`. Models registered with `optional=True` (accelerators the service works without) do not
+    count towards `is_ready()`. Callers hold a model for the duration of a request with `async with use(name)`,
+    which waits for the load to finish and raises `ModelUnavailableError` if it failed.
+
+    `swap()` loads and warms up another version in the background and then replaces the active one atomically.
+    Requests that already hold the old version finish on it; once the last of them exits, the loader drops the
+    old version and calls `on_release`, so its memory can be reclaimed.
+    """
+
+    def __init__(self, max_workers, on_activate=None, on_release=None):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="model-loader")
+        self.loaders = {}
+        self.warmups = {}
+        self.versions = {}
+        self.lazy = set()
+        self.optional = set()
+        self.active = {}
+        self.pending = {}
+        self.draining = {}
+        self.load_seconds = {}
+        self.swap_errors = {}
+        self.on_activate = on_activate
+        self.on_release = on_release
+        self.lock = threading.Lock()
+
+    def register(self, name, load_fn, version, lazy=False, warmup_fn=None, optional=False):
+        self.loaders[name] = load_fn
+        self.versions[name] = version
+        if warmup_fn is not None:
+            self.warmups[name] = warmup_fn
+        if lazy:
+            self.lazy.add(name)
+        if optional:
+            self.optional.add(name)
+
+    def start(self):
+        for name in self.loaders:
+            if name not in self.lazy:
+                self._submit(name)
+
+    def _submit(self, name):
+        with self.lock:
+            return self._get_active(name)
+
+    def _get_active(self, name):
+        model_version = self.active.get(name)
+        if model_version is None:
+            version = self.versions[name]
+            future = self.executor.submit(self._load, name, version)
+            model_version = ModelVersion(name, version, future)
+            self.active[name] = model_version
+            future.add_done_callback(lambda f: self._activated(model_version))
+        return model_version
+
+    def _load(self, name, version):
+        start = time.perf_counter()
+        value = self.loaders[name](version)
+        if name in self.warmups:
+            self.warmups[name](value)
+        self.load_seconds[name] = time.perf_counter() - start
+        return value
+
+    def _activated(self, model_version):
+        if model_version.retired or self.on_activate is None:
+            return
+        if model_version.future.exception() is None:
+            self.on_activate(model_version.name, model_version.version, model_version.value)
+
+    @asynccontextmanager
+    async def use(self, name):
+        with self.lock:
+            model_version = self._get_active(name)
+            model_version.in_flight += 1
+        try:
+            try:
+                await asyncio.wrap_future(model_version.future)
+            except Exception as e:
+                raise ModelUnavailableError(name, e)
+            yield model_version
+        finally:
+            self._leave(model_version)
+
+    def _leave(self, model_version):
+        with self.lock:
+            model_version.in_flight -= 1
+            drained = model_version.retired and model_version.in_flight == 0
+        if drained:
+            # Releasing closes stores and collects garbage; _leave runs on the event loop, so it is done in the
+            # background
+            self.executor.submit(self._release, model_version)
+
+    def _release(self, model_version):
+        with self.lock:
+            draining = self.draining.get(model_version.name, {})
+            if draining.get(model_version.version) is model_version:
+                del draining[model_version.version]
+        future = model_version.future
+        model_version.future = None
+        if future.done() and future.exception() is None and self.on_release is not None:
+            self.on_release(model_version.name, model_version.version, future.result())
+        del future
+        gc.collect()
+
+    def peek(self, name, version=None, load=True):
+        """
+        Returns the loaded value of the active version of `name` (only if it is `version`, when given) without
+        waiting; None while it is loading, failed or not loaded. With `load`, a lazy model that was never used
+        starts loading, so models only ever peeked at (the phrase index) can be lazy too.
+        """
+        model_version = self.active.get(name)
+        if model_version is None and load and name in self.lazy:
+            model_version = self._submit(name)
+        if model_version is None or (version is not None and model_version.version != version):
+            return None
+        future = model_version.future
+        if not future.done() or future.exception() is not None:
+            return None
+        return future.result()
+
+    def swap(self, name, version):
+        """
+        Starts loading `version` of model `name` in the background; it becomes active once loaded and warmed up.
+        A failed load leaves the current version in place and is reported in `status()`.
+        """
+        with self.lock:
+            if name in self.pending:
+                raise RuntimeError(f"Model '{name}' is already being swapped to '{self.pending[name].version}'")
+            future = self.executor.submit(self._load, name, version)
+            model_version = ModelVersion(name, version, future)
+            self.pending[name] = model_version
+            self.swap_errors.pop(name, None)
+        future.add_done_callback(lambda f: self._swapped(model_version))
+        return future
+
+    def _swapped(self, model_version):
+        name = model_version.name
+        with self.lock:
+            self.pending.pop(name, None)
+            if model_version.future.exception() is not None:
+                self.swap_errors[name] = f"{model_version.version}: {model_version.future.exception()}"
+                return
+            old = self.active.get(name)
+            self.active[name] = model_version
+            self.versions[name] = model_version.version
+            drained = False
+            if old is not None:
+                old.retired = True
+                drained = old.in_flight == 0
+                if not drained:
+                    self.draining.setdefault(name, {})[old.version] = old
+        self._activated(model_version)
+        if old is not None and drained:
+            self._release(old)
+
+    def model_status(self, name):
+        model_version = self.active.get(name)
+        if model_version is None:
+            return "not_loaded"
+        if not model_version.future.done():
+            return "loading"
+        if model_version.future.exception() is not None:
+            return "failed"
+        return "ready"
+
+    def is_ready(self):
+        return all(self.model_status(name) == "ready" for name in self.loaders
+                   if name not in self.lazy and name not in self.optional)
+
+    def status(self):
+        status = {}
+        for name in self.loaders:
+            model_status = self.model_status(name)
+            pending = self.pending.get(name)
+            status[name] = {
+                "status": model_status,
+                "version": self.versions[name],
+                "lazy": name in self.lazy,
+                "optional": name in self.optional,
+                "load_seconds": self.load_seconds.get(name),
+                "error": str(self.active[name].future.exception()) if model_status == "failed" else None,
+                "in_flight": self.active[name].in_flight if name in self.active else 0,
+                "pending_version": pending.version if pending is not None else None,
+                "draining_versions": {version: old.in_flight for version, old in self.draining.get(name, {}).items()},
+                "swap_error": self.swap_errors.get(name)
+            }
+        return status
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,42 @@
+import os
+
+from config import YOLO_BACKEND
+from bertTrainer.bert_config import BERT_MODEL_PATH
+from cnnTrimChecker.cnn_config import CNN_MODEL_PATH
+from yoloTrainer.yolo_config import YOLO_RUNS_DIR, YOLO_BACKEND_ARTIFACTS
+
+
+def get_yolo_weights_path(run_name, backend=YOLO_BACKEND):
+    if backend not in YOLO_BACKEND_ARTIFACTS:
+        raise ValueError(f"Unknown YOLO backend: {backend}")
+    return os.path.join(YOLO_RUNS_DIR, run_name, 'weights', YOLO_BACKEND_ARTIFACTS[backend])
+
+
+def list_bert_models():
+    if not os.path.isdir(BERT_MODEL_PATH):
+        return []
+    return sorted(name for name in os.listdir(BERT_MODEL_PATH)
+                  if os.path.isfile(os.path.join(BERT_MODEL_PATH, name, "encoder")))
+
+
+def list_cnn_models():
+    if not os.path.isdir(CNN_MODEL_PATH):
+        return []
+    return sorted(name[:-len('.keras')] for name in os.listdir(CNN_MODEL_PATH) if name.endswith('.keras'))
+
+
+def list_yolo_models():
+    if not os.path.isdir(YOLO_RUNS_DIR):
+        return []
+    return sorted(name for name in os.listdir(YOLO_RUNS_DIR) if os.path.exists(get_yolo_weights_path(name)))
+
+
+MODEL_LISTERS = {
+    "bert": list_bert_models,
+    "cnn": list_cnn_models,
+    "yolo": list_yolo_models,
+}
+
+
+def list_models():
+    return {kind: lister() for kind, lister in MODEL_LISTERS.items()}
@@ -0,0 +1,134 @@
+import threading
+import zlib
+
+import numpy as np
+
+from services.prediction_cache import normalize_title
+
+
+def char_ngrams(text, ngram_sizes):
+    text = f" {normalize_title(text).lower()} "
+    return [text[i:i + n] for n in ngram_sizes for i in range(len(text) - n + 1)]
+
+
+def hash_ngrams(text, ngram_sizes, dimensions):
+    return [zlib.crc32(ngram.encode('utf-8')) % dimensions for ngram in char_ngrams(text, ngram_sizes)]
+
+
+class PhraseIndex:
+    """
+    Nearest-neighbour lookup over the training phrases of bertTrainer/bert_data.
+
+    Phrases are stored as L2-normalized hashed character n-gram vectors in one contiguous float32 matrix, so a
+    batch of queries is a single matrix-matrix product. A title is answered from the index only when its best
+    category clears `threshold` and beats the runner-up category by `min_margin`; otherwise `lookup` returns None
+    and the caller falls back to the classifier.
+    """
+
+    def __init__(self, phrases, phrase_labels, num_labels, ngram_sizes, dimensions, threshold, min_margin,
+                 temperature, neighbours=50, batch_size=256):
+        self.ngram_sizes = ngram_sizes
+        self.dimensions = dimensions
+        self.threshold = threshold
+        self.min_margin = min_margin
+        self.temperature = temperature
+        self.num_labels = num_labels
+        self.neighbours = neighbours
+        self.batch_size = batch_size
+        self.phrase_labels = np.asarray(phrase_labels, dtype=np.int64)
+        self.exact = {}
+        for phrase, label in zip(phrases, phrase_labels):
+            self.exact.setdefault(normalize_title(phrase).lower(), set()).add(int(label))
+
+        rows = []
+        columns = []
+        for row, phrase in enumerate(phrases):
+            hashed = hash_ngrams(phrase, ngram_sizes, dimensions)
+            rows.extend([row] * len(hashed))
+            columns.extend(hashed)
+
+        matrix = np.zeros((len(phrases), dimensions), dtype=np.float32)
+        np.add.at(matrix, (np.asarray(rows, dtype=np.int64), np.asarray(columns, dtype=np.int64)), 1.0)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        self.matrix = np.ascontiguousarray(matrix / norms)
+
+        self.lock = threading.Lock()
+        self.lookups = 0
+        self.hits = 0
+
+    def vectorize(self, title):
+        vector = np.bincount(hash_ngrams(title, self.ngram_sizes, self.dimensions),
+                             minlength=self.dimensions).astype(np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def category_similarities(self, titles):
+        # One matrix-matrix product for all titles; rows are titles, columns categories
+        similarities = np.stack([self.vectorize(title) for title in titles]) @ self.matrix.T
+        neighbours = min(self.neighbours, similarities.shape[1])
+        nearest = np.argpartition(-similarities, neighbours - 1, axis=1)[:, :neighbours]
+
+        category_similarities = np.zeros((len(titles), self.num_labels), dtype=np.float32)
+        rows = np.broadcast_to(np.arange(len(titles))[:, None], nearest.shape)
+        np.maximum.at(category_similarities, (rows, self.phrase_labels[nearest]),
+                      np.take_along_axis(similarities, nearest, axis=1))
+        return category_similarities
+
+    def lookup(self, title):
+        return self.lookup_many([title])[0]
+
+    def lookup_many(self, titles):
+        """
+        Softmax-like score vectors for `titles`, None for titles the index cannot answer confidently. Titles are
+        scored in chunks of `batch_size` to bound the (titles x phrases) similarity matrix.
+        """
+        results = []
+        for start in range(0, len(titles), self.batch_size):
+            results.extend(self._lookup_chunk(titles[start:start + self.batch_size]))
+        return results
+
+    def _lookup_chunk(self, titles):
+        category_similarities = self.category_similarities(titles)
+        for row, title in enumerate(titles):
+            exact_labels = self.exact.get(normalize_title(title).lower())
+            if exact_labels is not None and len(exact_labels) == 1:
+                category_similarities[row] = 0.0
+                category_similarities[row, next(iter(exact_labels))] = 1.0
+
+        top_two = np.sort(np.partition(category_similarities, -2, axis=1)[:, -2:], axis=1)
+        best, runner_up = top_two[:, 1], top_two[:, 0]
+        hits = (best >= self.threshold) & (best - runner_up >= self.min_margin)
+
+        with self.lock:
+            self.lookups += len(titles)
+            self.hits += int(hits.sum())
+
+        exp = np.exp((category_similarities - best[:, None]) / self.temperature)
+        probabilities = exp / exp.sum(axis=1, keepdims=True)
+        return [row if hit else None for row, hit in zip(probabilities, hits)]
+
+    def stats(self):
+        with self.lock:
+            return {
+                "phrases": len(self.matrix),
+                "lookups": self.lookups,
+                "hits": self.hits,
+                "hit_rate": self.hits / self.lookups if self.lookups else 0.0
+            }
+
+
+def build_phrase_index(label_encoder, ngram_sizes, dimensions, threshold, min_margin, temperature):
+    from bertTrainer.bert_categorizer.bert_data_processing import get_bert_data_dict
+
+    known_categories = set(label_encoder.classes_)
+    phrases = []
+    categories = []
+    for category, category_phrases in get_bert_data_dict().items():
+        if category not in known_categories:
+            continue
+        phrases.extend(category_phrases)
+        categories.extend([category] * len(category_phrases))
+
+    return PhraseIndex(phrases, label_encoder.transform(categories), len(label_encoder.classes_), ngram_sizes,
+                       dimensions, threshold, min_margin, temperature)
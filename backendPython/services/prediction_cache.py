@@ -0,0 +1,91 @@
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+
+def normalize_title(title):
+    return " ".join(unicodedata.normalize("NFC", title).split())
+
+
+class PredictionCache:
+    """
+    In-process LRU cache of softmax vectors keyed by normalized title.
+
+    Entries belong to a single model version, adopted on first use or set with `set_model()`, which clears the
+    cache. Lookups and inserts for any other version (e.g. requests still draining on a swapped-out model) bypass it.
+    With `ttl_seconds` set to None entries never expire and are only dropped by LRU eviction.
+    """
+
+    def __init__(self, max_size, ttl_seconds=None):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.entries = OrderedDict()
+        self.model_name = None
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _check_model(self, model_name):
+        if self.model_name is None:
+            self.model_name = model_name
+        return model_name == self.model_name
+
+    def set_model(self, model_name):
+        with self.lock:
+            if model_name != self.model_name:
+                self.entries.clear()
+                self.model_name = model_name
+
+    def get(self, model_name, title):
+        key = normalize_title(title)
+        with self.lock:
+            if not self._check_model(model_name):
+                self.misses += 1
+                return None
+            entry = self.entries.get(key)
+
+            if entry is not None and self.ttl_seconds is not None and time.monotonic() > entry[1]:
+                del self.entries[key]
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, model_name, title, probabilities):
+        if self.max_size <= 0:
+            return
+        key = normalize_title(title)
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds is not None else None
+        with self.lock:
+            if not self._check_model(model_name):
+                return
+            self.entries[key] = (probabilities, expires_at)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "model_name": self.model_name,
+                "size": len(self.entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
@@ -0,0 +1,165 @@
+import queue
+import sqlite3
+import threading
+import time
+from collections import Counter
+
+import numpy as np
+
+from services.prediction_cache import normalize_title
+
+
+class PredictionStore:
+    """
+    SQLite-backed softmax cache shared by all Uvicorn workers of one machine.
+
+    The database runs in WAL mode, so any number of readers can query it while a write is in progress.
+    Each process funnels its inserts and hit counters through one background writer thread which commits
+    them in batches; SQLite's file lock serializes writers of different processes. Hits are counted for every
+    request of a title, including those served from the in-process cache (`count_hits`), and `hottest()`
+    preloads the most requested titles.
+    """
+
+    def __init__(self, path, model_version, write_batch_size=256):
+        self.path = path
+        self.model_version = model_version
+        self.write_batch_size = write_batch_size
+        self.local = threading.local()
+        self.write_queue = queue.Queue()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        connection = self._connect()
+        with connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS predictions ("
+                "model_version TEXT NOT NULL, "
+                "title TEXT NOT NULL, "
+                "probabilities BLOB NOT NULL, "
+                "hits INTEGER NOT NULL DEFAULT 0, "
+                "updated_at REAL NOT NULL, "
+                "PRIMARY KEY (model_version, title)) WITHOUT ROWID"
+            )
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS predictions_hits ON predictions (model_version, hits DESC)"
+            )
+        connection.close()
+
+        self.writer = threading.Thread(target=self._write_loop, name="prediction-store-writer", daemon=True)
+        self.writer.start()
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path, timeout=30)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    def _reader(self):
+        connection = getattr(self.local, "connection", None)
+        if connection is None:
+            connection = self._connect()
+            self.local.connection = connection
+        return connection
+
+    def get(self, title):
+        return self.get_many([title])[0]
+
+    def get_many(self, titles, chunk_size=500):
+        # One query per `chunk_size` titles, below SQLite's limit on bound parameters
+        keys = [normalize_title(title) for title in titles]
+        found = {}
+        for start in range(0, len(keys), chunk_size):
+            chunk = list(set(keys[start:start + chunk_size]))
+            found.update(self._reader().execute(
+                "SELECT title, probabilities FROM predictions WHERE model_version = ? AND title IN "
+                f"({', '.join('?' * len(chunk))})",
+                [self.model_version] + chunk
+            ).fetchall())
+
+        hit_keys = [key for key in keys if key in found]
+        with self.lock:
+            self.hits += len(hit_keys)
+            self.misses += len(keys) - len(hit_keys)
+        if hit_keys:
+            self.write_queue.put(("hits", hit_keys))
+        return [np.frombuffer(found[key], dtype=np.float32) if key in found else None for key in keys]
+
+    def count_hits(self, titles):
+        """
+        Records hits on titles answered from the in-process cache, which never reach the store, so that
+        `hottest()` ranks titles by how often they are requested rather than by in-process cache misses.
+        """
+        if titles:
+            self.write_queue.put(("hits", [normalize_title(title) for title in titles]))
+
+    def put(self, title, probabilities):
+        blob = np.asarray(probabilities, dtype=np.float32).tobytes()
+        self.write_queue.put(("put", normalize_title(title), blob))
+
+    def hottest(self, limit):
+        rows = self._reader().execute(
+            "SELECT title, probabilities FROM predictions WHERE model_version = ? ORDER BY hits DESC LIMIT ?",
+            (self.model_version, limit)
+        ).fetchall()
+        return [(title, np.frombuffer(blob, dtype=np.float32)) for title, blob in rows]
+
+    def _write_loop(self):
+        connection = self._connect()
+        running = True
+
+        while running:
+            operations = [self.write_queue.get()]
+            while len(operations) < self.write_batch_size:
+                try:
+                    operations.append(self.write_queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            if None in operations:
+                running = False
+                operations = [operation for operation in operations if operation is not None]
+
+            now = time.time()
+            puts = {}
+            hits = Counter()
+            for operation in operations:
+                if operation[0] == "put":
+                    puts[operation[1]] = operation[2]
+                else:
+                    hits.update(operation[1])
+
+            try:
+                with connection:
+                    connection.executemany(
+                        "INSERT INTO predictions (model_version, title, probabilities, updated_at) "
+                        "VALUES (?, ?, ?, ?) "
+                        "ON CONFLICT (model_version, title) "
+                        "DO UPDATE SET probabilities = excluded.probabilities, updated_at = excluded.updated_at",
+                        [(self.model_version, key, blob, now) for key, blob in puts.items()]
+                    )
+                    connection.executemany(
+                        "UPDATE predictions SET hits = hits + ? WHERE model_version = ? AND title = ?",
+                        [(count, self.model_version, key) for key, count in hits.items()]
+                    )
+            except sqlite3.Error as e:
+                print(f"Error while writing to the prediction store: {e}")
+
+        connection.close()
+
+    def close(self):
+        self.write_queue.put(None)
+        self.writer.join()
+
+    def stats(self):
+        with self.lock:
+            hits, misses = self.hits, self.misses
+        lookups = hits + misses
+        return {
+            "path": self.path,
+            "model_version": self.model_version,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "pending_writes": self.write_queue.qsize()
+        }
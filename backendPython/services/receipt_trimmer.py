@@ -1,7 +1,12 @@
+from collections import OrderedDict
+
 import cv2
 import numpy as np
 
-from cnnTrimChecker.cnn_service.cnn_predict import check_trimmed_image
+from cnnTrimChecker.cnn_config import TRIM_CONTOUR_GRID, TRIM_MIN_AREA_RATIO, TRIM_MIN_CONTOUR_SCORE, \
+    TRIM_STAGE_CACHE_SIZE, TRIM_CANDIDATE_BATCH_SIZE, TRIM_PROXY_MAX_SIDE, TRIM_MIN_PAPER_RATIO, \
+    TRIM_PAPER_CHECK_SIDE, TRIM_PAPER_MIN_VALUE, TRIM_PAPER_MAX_SATURATION
+from cnnTrimChecker.cnn_service.cnn_predict import check_trimmed_image_rotations
 
 
 def convert_to_grayscale(image):
@@ -22,10 +27,12 @@ def morph_operations(edged, kernel_size, morph_type=cv2.MORPH_CLOSE, iterations=
     return cv2.morphologyEx(edged, morph_type, kernel, iterations=iterations)
 
 
-def find_receipt_contour(processed, epsilon_factor):
+def find_sorted_contours(processed):
     contours, _ = cv2.findContours(processed.copy(), cv2.RETR_LIST, cv2.CHAIN_APPROX_SIMPLE)
-    contours = sorted(contours, key=cv2.contourArea, reverse=True)
+    return sorted(contours, key=cv2.contourArea, reverse=True)
+
 
+def approximate_receipt_contour(contours, epsilon_factor):
     for contour in contours:
         peri = cv2.arcLength(contour, True)
         approx = cv2.approxPolyDP(contour, epsilon_factor * peri, True)
@@ -87,20 +94,134 @@ def rotate(image):
     return cv2.rotate(image, cv2.ROTATE_90_CLOCKWISE)
 
 
-def trim_receipt(image, cnn_model, blur_kernel_size, morph_kernel_size, morph_iterations, epsilon_factor,
-                 dilation_iterations, erosion_iterations):
+def rotate_times(image, k):
+    for _ in range(k):
+        image = rotate(image)
+    return image
+
 
-    gray = convert_to_grayscale(image)
+class TrimPipeline:
+    """Trimming stages of one image, memoized on their parameters and run on a downscaled proxy if configured."""
+
+    def __init__(self, image, cache_size=TRIM_STAGE_CACHE_SIZE, proxy_max_side=TRIM_PROXY_MAX_SIDE):
+        self.image = image
+        self.cache_size = cache_size
+        self.scale = 1.0
+        if proxy_max_side is not None and max(image.shape[:2]) > proxy_max_side:
+            self.scale = proxy_max_side / max(image.shape[:2])
+        self.gray = None
+        self.edges = {}
+        self.stages = OrderedDict()
+        self.contours = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get_gray(self):
+        if self.gray is None:
+            image = self.image
+            if self.scale < 1.0:
+                height, width = image.shape[:2]
+                size = (max(1, round(width * self.scale)), max(1, round(height * self.scale)))
+                image = cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+            self.gray = convert_to_grayscale(image)
+        return self.gray
+
+    def scale_kernel(self, kernel_size, odd=False):
+        if self.scale == 1.0:
+            return kernel_size
+        scaled = []
+        for size in kernel_size:
+            size = max(1, round(size * self.scale))
+            if odd and size % 2 == 0:
+                size += 1
+            scaled.append(size)
+        return tuple(scaled)
+
+    def get_edges(self, blur_kernel_size):
+        edged = self.edges.get(blur_kernel_size)
+        if edged is None:
+            edged = detect_edges(apply_gaussian_blur(self.get_gray(), blur_kernel_size))
+            self.edges[blur_kernel_size] = edged
+        return edged
+
+    def _cached(self, cache, key, compute):
+        value = cache.get(key)
+        if value is not None:
+            self.hits += 1
+            cache.move_to_end(key)
+            return value
+        self.misses += 1
+        value = compute()
+        cache[key] = value
+        if len(cache) > self.cache_size:
+            cache.popitem(last=False)
+        return value
+
+    def get_processed(self, blur_kernel_size, morph_kernel_size, morph_iterations, dilation_iterations,
+                      erosion_iterations):
+        # Keys use the scaled kernels, so combinations whose kernels coincide on the proxy share stages
+        blur_kernel_size = self.scale_kernel(blur_kernel_size, odd=True)
+        morph_kernel_size = self.scale_kernel(morph_kernel_size)
+        closed_key = (blur_kernel_size, morph_kernel_size, morph_iterations)
+        dilated_key = closed_key + (dilation_iterations,)
+        eroded_key = dilated_key + (erosion_iterations,)
+
+        closed = self._cached(self.stages, closed_key, lambda: morph_operations(
+            self.get_edges(blur_kernel_size), morph_kernel_size, morph_type=cv2.MORPH_CLOSE,
+            iterations=morph_iterations))
+        dilated = self._cached(self.stages, dilated_key, lambda: morph_operations(
+            closed, morph_kernel_size, morph_type=cv2.MORPH_DILATE, iterations=dilation_iterations))
+        return eroded_key, self._cached(self.stages, eroded_key, lambda: morph_operations(
+            dilated, morph_kernel_size, morph_type=cv2.MORPH_ERODE, iterations=erosion_iterations))
+
+    def find_candidate_contour(self, blur_kernel_size, morph_kernel_size, morph_iterations, epsilon_factor,
+                               dilation_iterations, erosion_iterations):
+        key, processed = self.get_processed(blur_kernel_size, morph_kernel_size, morph_iterations,
+                                            dilation_iterations, erosion_iterations)
+        contours = self._cached(self.contours, key, lambda: find_sorted_contours(processed))
+        contour = approximate_receipt_contour(contours, epsilon_factor)
+        if contour is None or self.scale == 1.0:
+            return contour
+        return np.round(contour / self.scale).astype(contour.dtype)
+
+
+def contour_key(contour, grid=TRIM_CONTOUR_GRID):
+    # Corners snapped to a grid and sorted, so the same quadrilateral found by different combinations (with
+    # a different starting corner or a pixel of jitter) gets the same key
+    corners = np.round(contour.reshape(4, 2) / grid).astype(int)
+    return tuple(sorted(map(tuple, corners)))
+
+
+def score_contour(contour, image_shape):
+    """Plausibility of a receipt quadrilateral in [0, 1]; 0 for non-convex or too small ones."""
+    area = cv2.contourArea(contour)
+    if not cv2.isContourConvex(contour) or area < TRIM_MIN_AREA_RATIO * image_shape[0] * image_shape[1]:
+        return 0.0
+    (_, _), (width, height), _ = cv2.minAreaRect(contour)
+    if width <= 0 or height <= 0:
+        return 0.0
+    return min(area / (width * height), 1.0)
+
+
+def classify_candidates(images, cnn_model, stats=None):
+    if stats is not None and images:
+        stats["cnn_calls"] += 1
+        stats["cnn_images"] += 4 * len(images)
+    return [(result, rotate_times(image, k))
+            for image, (result, k) in zip(images, check_trimmed_image_rotations(images, cnn_model))]
+
+
+def classify_candidate(image, cnn_model, stats=None):
+    return classify_candidates([image], cnn_model, stats)[0]
 
-    blurred = apply_gaussian_blur(gray, blur_kernel_size)
-    edged = detect_edges(blurred)
 
-    closed = morph_operations(edged, morph_kernel_size, morph_type=cv2.MORPH_CLOSE, iterations=morph_iterations)
-    dilated = morph_operations(closed, morph_kernel_size, morph_type=cv2.MORPH_DILATE, iterations=dilation_iterations)
-    eroded = morph_operations(dilated, morph_kernel_size, morph_type=cv2.MORPH_ERODE, iterations=erosion_iterations)
-    processed = eroded
+def trim_receipt(image, cnn_model, blur_kernel_size, morph_kernel_size, morph_iterations, epsilon_factor,
+                 dilation_iterations, erosion_iterations, pipeline=None):
 
-    receipt_contour = find_receipt_contour(processed, epsilon_factor)
+    if pipeline is None:
+        pipeline = TrimPipeline(image)
+    receipt_contour = pipeline.find_candidate_contour(blur_kernel_size, morph_kernel_size, morph_iterations,
+                                                      epsilon_factor, dilation_iterations, erosion_iterations)
     if receipt_contour is None:
         return None, None
 
@@ -110,15 +231,7 @@ def trim_receipt(image, cnn_model, blur_kernel_size, morph_kernel_size, morph_it
 
     resized_image = resize_if_needed(warped)
 
-    result = None
-    for i in range(4):
-        classification = check_trimmed_image(resized_image, cnn_model)
-        if classification == 'rotated':
-            resized_image = rotate(resized_image)
-        else:
-            result = classification
-            break
-    return result, resized_image
+    return classify_candidate(resized_image, cnn_model)
 
 
 def load_image(image_path):
@@ -128,12 +241,86 @@ def load_image(image_path):
     return image
 
 
-def perform_trimming(image, combinations, cnn_model):
+def measure_paper_ratio(image, max_side=TRIM_PAPER_CHECK_SIDE):
+    # Fraction of bright, unsaturated (paper-like) pixels on a thumbnail of the image
+    height, width = image.shape[:2]
+    scale = min(1.0, max_side / max(height, width))
+    thumbnail = cv2.resize(image, (max(1, round(width * scale)), max(1, round(height * scale))),
+                           interpolation=cv2.INTER_AREA)
+    hsv = cv2.cvtColor(thumbnail, cv2.COLOR_BGR2HSV)
+    paper = (hsv[..., 2] >= TRIM_PAPER_MIN_VALUE) & (hsv[..., 1] <= TRIM_PAPER_MAX_SATURATION)
+    return float(np.mean(paper))
+
+
+def new_trimming_stats():
+    return {
+        "rejected_early": 0,
+        "paper_ratio": None,
+        "combinations": 0,
+        "no_contour": 0,
+        "duplicates": 0,
+        "implausible": 0,
+        "candidates": 0,
+        "cnn_calls": 0,
+        "cnn_images": 0
+    }
+
+
+def perform_trimming(image, combinations, cnn_model, stats=None, proxy_max_side=TRIM_PROXY_MAX_SIDE,
+                     min_paper_ratio=TRIM_MIN_PAPER_RATIO):
+    """Returns (first crop the CNN classifies as positive, True), or (original image, False)."""
+    if stats is None:
+        stats = new_trimming_stats()
+
+    if min_paper_ratio is not None:
+        stats["paper_ratio"] = measure_paper_ratio(image)
+        if stats["paper_ratio"] < min_paper_ratio:
+            stats["rejected_early"] = 1
+            return image.copy(), False
 
     original_image = image.copy()
+    pipeline = TrimPipeline(image, proxy_max_side=proxy_max_side)
+    seen_contours = set()
+    candidates = []
+
+    for combination in combinations:
+        stats["combinations"] += 1
+
+        contour = pipeline.find_candidate_contour(*combination)
+        if contour is None:
+            stats["no_contour"] += 1
+            continue
+
+        key = contour_key(contour)
+        if key in seen_contours:
+            stats["duplicates"] += 1
+            continue
+        seen_contours.add(key)
+
+        if score_contour(contour, image.shape) < TRIM_MIN_CONTOUR_SCORE:
+            stats["implausible"] += 1
+            continue
+
+        warped = perform_perspective_transform(image, contour)
+        if warped is None:
+            continue
+        stats["candidates"] += 1
+
+        candidates.append(resize_if_needed(warped))
+        if len(candidates) == TRIM_CANDIDATE_BATCH_SIZE:
+            trimmed_image = find_positive_candidate(candidates, cnn_model, stats)
+            if trimmed_image is not None:
+                return trimmed_image, True
+            candidates = []
+
+    trimmed_image = find_positive_candidate(candidates, cnn_model, stats)
+    if trimmed_image is not None:
+        return trimmed_image, True
+    return original_image, False
+
 
-    for index, combination in enumerate(combinations):
-        result, resized_image = trim_receipt(image, cnn_model, *combination)
+def find_positive_candidate(candidates, cnn_model, stats=None):
+    for result, image in classify_candidates(candidates, cnn_model, stats):
         if result == "positive":
-            return resized_image, True
-    return original_image, False
+            return image
+    return None
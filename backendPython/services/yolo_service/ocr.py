@@ -96,24 +96,17 @@ def classify_payment_type_fuzzy(text):
     return best_match
 
 
-def extract_ocr_text(image, detection, class_name):
-    if 'boxes' in detection:
-        box = detection['box']
-        x1, y1, x2, y2 = box.xyxy.tolist()[0]
-        x1, y1, x2, y2 = int(x1), int(y1), int(x2), int(y2)
-    elif 'obb' in detection:
-        obb = detection['obb']
-        coords = obb.xyxyxyxy.tolist()[0] if hasattr(obb.xyxyxyxy, 'tolist') else list(obb.xyxyxyxy)
-        points = [tuple(point) for point in coords]
-        x_coords, y_coords = zip(*points)
-        x1, y1 = max(int(min(x_coords)), 0), max(int(min(y_coords)), 0)
-        x2, y2 = min(int(max(x_coords)), image.shape[1]), min(int(max(y_coords)), image.shape[0])
-    else:
-        print("Unknown detection type.")
-        print(detection)
-        return ""
+def crop_detection(image, detection):
+    # `detection` is a row of the array returned by get_best_detections; crops the polygon's bounding box
+    polygon = detection['polygon']
+    x1, y1 = max(int(polygon[:, 0].min()), 0), max(int(polygon[:, 1].min()), 0)
+    x2, y2 = min(int(polygon[:, 0].max()), image.shape[1]), min(int(polygon[:, 1].max()), image.shape[0])
+    return image[y1:y2, x1:x2]
 
-    cropped_area = image[y1:y2, x1:x2]
+
+def read_ocr_text(cropped_area, class_name):
+    if cropped_area is None:
+        return ""
     if cropped_area.size == 0:
         print("Warning: The cropped area is empty.")
         return ""
@@ -126,6 +119,10 @@ def extract_ocr_text(image, detection, class_name):
     return corrected_text
 
 
+def extract_ocr_text(image, detection, class_name):
+    return read_ocr_text(crop_detection(image, detection), class_name)
+
+
 def get_tesseract_config(class_name):
     if class_name == "date":
         # Only digits and hyphens
@@ -214,18 +211,28 @@ def correct_ocr_text(text, class_name):
         return text
 
 
-def perform_ocr_on_detections(image, detections):
-    ocr_results = {class_name: "" for class_name in CLASS_NAMES}
-
-    for class_id, detection in detections.items():
+def crop_detections(image, detections):
+    crops = {}
+    for detection in detections:
+        class_id = int(detection['class_id'])
         class_name = CLASS_NAMES[class_id] if class_id < len(CLASS_NAMES) else "unknown_class"
+        crops[class_name] = crop_detection(image, detection)
+    return crops
 
-        ocr_text = extract_ocr_text(image, detection, class_name)
 
-        if class_name == "payment_type":
-            predicted_payment_type = classify_payment_type_fuzzy(ocr_text)
-            ocr_results[class_name] = predicted_payment_type
-        else:
-            ocr_results[class_name] = ocr_text
+def read_field(cropped_area, class_name):
+    ocr_text = read_ocr_text(cropped_area, class_name)
+    if class_name == "payment_type":
+        return classify_payment_type_fuzzy(ocr_text)
+    return ocr_text
+
 
+def perform_ocr_on_crops(crops):
+    ocr_results = {class_name: "" for class_name in CLASS_NAMES}
+    for class_name, cropped_area in crops.items():
+        ocr_results[class_name] = read_field(cropped_area, class_name)
     return ocr_results
+
+
+def perform_ocr_on_detections(image, detections):
+    return perform_ocr_on_crops(crop_detections(image, detections))
@@ -0,0 +1,6 @@
+from config import PYTESSERACT_PATH
+
+
+def init_ocr_worker():
+    import pytesseract
+    pytesseract.pytesseract.tesseract_cmd = PYTESSERACT_PATH
@@ -1,56 +1,154 @@
+import math
+
 import cv2
 import numpy as np
-from yoloTrainer.yolo_config import CONF_THRESHOLD
+from yoloTrainer.yolo_config import CONF_THRESHOLD, YOLO_IMGSZ, YOLO_SQUARE_IMGSZ, YOLO_STRIDE
+
+# Best detection per class: class id, confidence and the four corners of its (oriented) box in image coordinates
+DETECTION_DTYPE = np.dtype([('class_id', np.int32), ('conf', np.float32), ('polygon', np.float32, (4, 2))])
+
+
+def letterbox(image, imgsz, color=(114, 114, 114), scale=None):
+    """
+    Resizes `image` by `scale` (default: the largest that fits `imgsz` (height, width) keeping its aspect ratio)
+    and pads it centrally to `imgsz`, as Ultralytics does. Returns (letterboxed image, scale, (pad_x, pad_y)).
+    """
+    height, width = image.shape[:2]
+    if scale is None:
+        scale = min(imgsz[0] / height, imgsz[1] / width)
+    new_width, new_height = round(width * scale), round(height * scale)
+    if (new_width, new_height) != (width, height):
+        image = cv2.resize(image, (new_width, new_height), interpolation=cv2.INTER_LINEAR)
+    pad_x, pad_y = (imgsz[1] - new_width) / 2, (imgsz[0] - new_height) / 2
+    top, bottom = round(pad_y - 0.1), round(pad_y + 0.1)
+    left, right = round(pad_x - 0.1), round(pad_x + 0.1)
+    letterboxed = cv2.copyMakeBorder(image, top, bottom, left, right, cv2.BORDER_CONSTANT, value=color)
+    return letterboxed, scale, (left, top)
+
+
+def letterbox_own_rectangle(image, size=YOLO_SQUARE_IMGSZ, stride=YOLO_STRIDE):
+    # Longer side `size`, the shorter one padded up to a multiple of `stride` - Ultralytics' input for one image
+    height, width = image.shape[:2]
+    scale = min(size / height, size / width)
+    imgsz = (math.ceil(round(height * scale) / stride) * stride, math.ceil(round(width * scale) / stride) * stride)
+    return letterbox(image, imgsz, scale=scale)
+
+
+def unletterbox_results(result, image, scale, pad):
+    # Maps detections from letterboxed coordinates back to the original image. Ultralytics creates the tensors
+    # under torch.inference_mode(), where they cannot be modified in place, so remapped copies are attached instead
+    pad_x, pad_y = pad
+    result.orig_img = image
+    result.orig_shape = image.shape[:2]
+    obb = getattr(result, 'obb', None)
+    if obb is not None and len(obb) > 0:
+        data = obb.data.clone()  # x_center, y_center, width, height, rotation, conf, cls
+        data[:, 0] = (data[:, 0] - pad_x) / scale
+        data[:, 1] = (data[:, 1] - pad_y) / scale
+        data[:, 2:4] /= scale
+        result.update(obb=data)
+    boxes = getattr(result, 'boxes', None)
+    if boxes is not None and len(boxes) > 0:
+        data = boxes.data.clone()  # x1, y1, x2, y2, conf, cls
+        data[:, [0, 2]] = (data[:, [0, 2]] - pad_x) / scale
+        data[:, [1, 3]] = (data[:, [1, 3]] - pad_y) / scale
+        result.update(boxes=data)
+    return result
+
+
+def predict(model, image, imgsz=YOLO_IMGSZ):
+    return predict_batch(model, [image], imgsz)
+
 
+def predict_batch(model, images, imgsz=YOLO_IMGSZ):
+    """
+    One Results object per image, in the order of `images`, with detections in original image coordinates.
+    With `imgsz` (height, width) set, all images are letterboxed to that rectangle (see YOLO_IMGSZ). With None,
+    each image gets its own rectangle and one forward pass runs per distinct rectangle, so an image is processed
+    exactly as if it was predicted alone - Ultralytics would pad a batch of differently shaped images to squares.
+    """
+    if imgsz is None:
+        letterboxed = [letterbox_own_rectangle(image) for image in images]
+    else:
+        letterboxed = [letterbox(image, imgsz) for image in images]
 
-def predict(model, image):
-    results = model.predict(
-        source=image,
-        conf=CONF_THRESHOLD,
-        save=False,
-        show=False,
-        verbose=False
-    )
+    groups = {}
+    for i, (image, _, _) in enumerate(letterboxed):
+        groups.setdefault(image.shape[:2], []).append(i)
+
+    results = [None] * len(images)
+    for shape, indices in groups.items():
+        group_results = model.predict(
+            source=[letterboxed[i][0] for i in indices],
+            imgsz=list(shape),
+            conf=CONF_THRESHOLD,
+            save=False,
+            show=False,
+            verbose=False
+        )
+        for i, result in zip(indices, group_results):
+            _, scale, pad = letterboxed[i]
+            results[i] = unletterbox_results(result, images[i], scale, pad)
     return results
 
 
-def get_best_detections(results):
-    best_detections = {}
-    for result in results:
-        for attr_name in ['boxes', 'obb']:
-            detections = getattr(result, attr_name, None)
-            if detections is not None:
-                if len(detections) > 0:
-                    for det in detections:
-                        class_id = int(det.cls.item()) if det.cls is not None else None
-                        confidence = det.conf.item() if det.conf is not None else 0.0
-
-                        if class_id is None:
-                            continue
-
-                        if (class_id not in best_detections) or (confidence > best_detections[class_id]['conf']):
-                            best_detections[class_id] = {
-                                attr_name: det,
-                                'conf': confidence
-                            }
-                    break
-                else:
-                    print(f"No object detections above the confidence threshold in '{attr_name}'.")
+def to_numpy(values):
+    return values.cpu().numpy() if hasattr(values, 'cpu') else np.asarray(values)
+
+
+def extract_detections(result):
+    """
+    Pulls class ids, confidences and corner polygons out of one Results object in a single transfer each.
+    Oriented boxes ('obb') give their four corners, axis-aligned 'boxes' are converted to four corners.
+    """
+    for attr_name in ['boxes', 'obb']:
+        detections = getattr(result, attr_name, None)
+        if detections is None:
+            continue
+        if len(detections) == 0:
+            print(f"No object detections above the confidence threshold in '{attr_name}'.")
+            break
+
+        if attr_name == 'obb':
+            polygons = to_numpy(detections.xyxyxyxy).reshape(-1, 4, 2)
         else:
-            print("No object detections above the confidence threshold (neither 'boxes' nor 'obb').")
+            x1, y1, x2, y2 = to_numpy(detections.xyxy).T
+            polygons = np.stack([np.stack([x1, y1], 1), np.stack([x2, y1], 1), np.stack([x2, y2], 1),
+                                 np.stack([x1, y2], 1)], axis=1)
+        return to_numpy(detections.cls).astype(np.int32), to_numpy(detections.conf).astype(np.float32), polygons
+    else:
+        print("No object detections above the confidence threshold (neither 'boxes' nor 'obb').")
+    return None
+
+
+def get_best_detections(results):
+    """
+    Returns the most confident detection of each class over `results` as a DETECTION_DTYPE array sorted by
+    class id (empty if nothing was detected). The array holds plain numbers only, so the Results objects (and
+    the tensors and image they keep) can be released as soon as this returns.
+    """
+    extracted = [detections for detections in map(extract_detections, results) if detections is not None]
+    if not extracted:
+        return np.empty(0, dtype=DETECTION_DTYPE)
+
+    class_ids = np.concatenate([detections[0] for detections in extracted])
+    confidences = np.concatenate([detections[1] for detections in extracted])
+    polygons = np.concatenate([detections[2] for detections in extracted])
+
+    # Sorted by class, then by descending confidence (stable, so the earlier of equally confident detections
+    # wins); the first row of every class is its best detection
+    order = np.lexsort((-confidences, class_ids))
+    _, first = np.unique(class_ids[order], return_index=True)
+    best = order[first]
+
+    best_detections = np.empty(len(best), dtype=DETECTION_DTYPE)
+    best_detections['class_id'] = class_ids[best]
+    best_detections['conf'] = confidences[best]
+    best_detections['polygon'] = polygons[best]
     return best_detections
 
 
 def draw_polygons(image, detections):
-    for class_id, detection in detections.items():
-        if 'boxes' in detection:
-            box = detection['box']
-            x1, y1, x2, y2 = box.xyxy.tolist()[0]
-            x1, y1, x2, y2 = int(x1), int(y1), int(x2), int(y2)
-            cv2.rectangle(image, (x1, y1), (x2, y2), color=(0, 0, 255), thickness=2)
-        elif 'obb' in detection:
-            obb = detection['obb']
-            coords = obb.xyxyxyxy.tolist()[0] if hasattr(obb.xyxyxyxy, 'tolist') else list(obb.xyxyxyxy)
-            points = [tuple(point) for point in coords]
-            pts = np.array(points, np.int32).reshape((-1, 1, 2))
-            cv2.polylines(image, [pts], isClosed=True, color=(0, 0, 255), thickness=2)
+    for detection in detections:
+        pts = detection['polygon'].astype(np.int32).reshape((-1, 1, 2))
+        cv2.polylines(image, [pts], isClosed=True, color=(0, 0, 255), thickness=2)
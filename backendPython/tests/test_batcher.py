@@ -0,0 +1,101 @@
+import asyncio
+
+import pytest
+
+from services.batcher import PredictionBatcher
+
+
+class RecordingPredictor:
+
+    def __init__(self, error=None):
+        self.batches = []
+        self.error = error
+
+    def __call__(self, items):
+        self.batches.append(list(items))
+        if self.error is not None:
+            raise self.error
+        return [item * 10 for item in items]
+
+
+async def run_with_batcher(batcher, coroutine):
+    batcher.start()
+    try:
+        return await coroutine
+    finally:
+        await batcher.stop()
+
+
+def test_batches_are_split_at_max_batch_size():
+    predictor = RecordingPredictor()
+    batcher = PredictionBatcher(predictor, max_batch_size=3, max_wait_ms=50)
+
+    async def submit_all():
+        return await asyncio.gather(*(batcher.submit(item) for item in range(7)))
+
+    results = asyncio.run(run_with_batcher(batcher, submit_all()))
+
+    assert results == [item * 10 for item in range(7)]
+    assert predictor.batches == [[0, 1, 2], [3, 4, 5], [6]]
+
+
+def test_batch_is_closed_after_max_wait():
+    predictor = RecordingPredictor()
+    batcher = PredictionBatcher(predictor, max_batch_size=10, max_wait_ms=20)
+
+    async def submit_late():
+        first = asyncio.gather(batcher.submit(1), batcher.submit(2))
+        await asyncio.sleep(0.2)
+        return await first, await batcher.submit(3)
+
+    results = asyncio.run(run_with_batcher(batcher, submit_late()))
+
+    assert results == ([10, 20], 30)
+    assert predictor.batches == [[1, 2], [3]]
+
+
+def test_batch_failure_reaches_every_waiting_request():
+    predictor = RecordingPredictor(error=ValueError("model failed"))
+    batcher = PredictionBatcher(predictor, max_batch_size=4, max_wait_ms=50)
+
+    async def submit_all():
+        return await asyncio.gather(*(batcher.submit(item) for item in range(4)), return_exceptions=True)
+
+    results = asyncio.run(run_with_batcher(batcher, submit_all()))
+
+    assert predictor.batches == [[0, 1, 2, 3]]
+    assert all(isinstance(result, ValueError) and str(result) == "model failed" for result in results)
+
+
+def test_batcher_keeps_serving_after_a_failed_batch():
+    calls = []
+
+    def predict_batch(items):
+        calls.append(list(items))
+        if len(calls) == 1:
+            raise ValueError("model failed")
+        return [item * 10 for item in items]
+
+    batcher = PredictionBatcher(predict_batch, max_batch_size=4, max_wait_ms=10)
+
+    async def submit_twice():
+        with pytest.raises(ValueError):
+            await batcher.submit(1)
+        return await batcher.submit(2)
+
+    assert asyncio.run(run_with_batcher(batcher, submit_twice())) == 20
+
+
+def test_runner_is_used_for_the_batch_function():
+    predictor = RecordingPredictor()
+
+    async def runner(fn, *args):
+        return await asyncio.to_thread(fn, *args)
+
+    batcher = PredictionBatcher(predictor, max_batch_size=2, max_wait_ms=20, runner=runner)
+
+    async def submit_all():
+        return await asyncio.gather(batcher.submit(1), batcher.submit(2))
+
+    assert asyncio.run(run_with_batcher(batcher, submit_all())) == [10, 20]
+    assert predictor.batches == [[1, 2]]
@@ -0,0 +1,142 @@
+import asyncio
+import threading
+
+import pytest
+
+from services.model_loader import ModelLoader, ModelUnavailableError
+
+
+class Recorder:
+
+    def __init__(self):
+        self.activated = []
+        self.released = []
+        self.release_event = threading.Event()
+
+    def on_activate(self, name, version, value):
+        self.activated.append((name, version, value))
+
+    def on_release(self, name, version, value):
+        self.released.append((name, version, value))
+        self.release_event.set()
+
+
+def load_model(version):
+    if version == "broken":
+        raise ValueError("missing weights")
+    return f"model-{version}"
+
+
+def create_loader(recorder, lazy=False):
+    loader = ModelLoader(max_workers=2, on_activate=recorder.on_activate, on_release=recorder.on_release)
+    loader.register("bert", load_model, "v1", lazy=lazy)
+    return loader
+
+
+def test_swap_drains_in_flight_requests_before_releasing_old_version():
+    recorder = Recorder()
+    loader = create_loader(recorder)
+
+    async def scenario():
+        loader.start()
+        async with loader.use("bert") as old:
+            assert old.value == "model-v1"
+
+            await asyncio.wrap_future(loader.swap("bert", "v2"))
+            assert loader.status()["bert"]["version"] == "v2"
+            assert loader.status()["bert"]["draining_versions"] == {"v1": 1}
+
+            async with loader.use("bert") as new:
+                assert new.value == "model-v2"
+            assert old.value == "model-v1"
+            assert recorder.released == []
+
+        assert await asyncio.to_thread(recorder.release_event.wait, 5)
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        loader.shutdown()
+
+    assert recorder.released == [("bert", "v1", "model-v1")]
+    assert loader.status()["bert"]["draining_versions"] == {}
+    assert recorder.activated == [("bert", "v1", "model-v1"), ("bert", "v2", "model-v2")]
+
+
+def test_swap_without_in_flight_requests_releases_old_version_at_once():
+    recorder = Recorder()
+    loader = create_loader(recorder)
+
+    async def scenario():
+        loader.start()
+        async with loader.use("bert"):
+            pass
+        await asyncio.wrap_future(loader.swap("bert", "v2"))
+
+    try:
+        asyncio.run(scenario())
+        assert recorder.release_event.wait(5)
+    finally:
+        loader.shutdown()
+
+    assert recorder.released == [("bert", "v1", "model-v1")]
+    assert loader.peek("bert") == "model-v2"
+
+
+def test_failed_swap_keeps_active_version():
+    recorder = Recorder()
+    loader = create_loader(recorder)
+
+    async def scenario():
+        loader.start()
+        with pytest.raises(ValueError):
+            await asyncio.wrap_future(loader.swap("bert", "broken"))
+        async with loader.use("bert") as model_version:
+            return model_version.value
+
+    try:
+        assert asyncio.run(scenario()) == "model-v1"
+    finally:
+        loader.shutdown()
+
+    status = loader.status()["bert"]
+    assert status["version"] == "v1"
+    assert status["swap_error"] == "broken: missing weights"
+    assert recorder.released == []
+
+
+def test_failed_load_raises_model_unavailable():
+    loader = ModelLoader(max_workers=1)
+    loader.register("bert", load_model, "broken")
+
+    async def scenario():
+        loader.start()
+        async with loader.use("bert"):
+            pass
+
+    try:
+        with pytest.raises(ModelUnavailableError):
+            asyncio.run(scenario())
+    finally:
+        loader.shutdown()
+
+    assert loader.model_status("bert") == "failed"
+    assert not loader.is_ready()
+
+
+def test_lazy_model_loads_on_first_use():
+    recorder = Recorder()
+    loader = create_loader(recorder, lazy=True)
+    loader.start()
+
+    assert loader.model_status("bert") == "not_loaded"
+    assert loader.is_ready()
+
+    async def scenario():
+        async with loader.use("bert") as model_version:
+            return model_version.value
+
+    try:
+        assert asyncio.run(scenario()) == "model-v1"
+    finally:
+        loader.shutdown()
@@ -0,0 +1,70 @@
+import services.prediction_cache as prediction_cache
+from services.prediction_cache import PredictionCache
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = PredictionCache(max_size=2)
+    cache.put("v1", "milk", [0.1])
+    cache.put("v1", "bread", [0.2])
+    assert cache.get("v1", "milk") == [0.1]
+
+    cache.put("v1", "eggs", [0.3])
+
+    assert cache.get("v1", "bread") is None
+    assert cache.get("v1", "milk") == [0.1]
+    assert cache.get("v1", "eggs") == [0.3]
+    assert cache.stats()["evictions"] == 1
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(prediction_cache.time, "monotonic", clock)
+    cache = PredictionCache(max_size=10, ttl_seconds=60)
+    cache.put("v1", "milk", [0.1])
+
+    clock.now += 59
+    assert cache.get("v1", "milk") == [0.1]
+
+    clock.now += 2
+    assert cache.get("v1", "milk") is None
+    assert cache.stats()["size"] == 0
+
+
+def test_entries_without_ttl_do_not_expire(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(prediction_cache.time, "monotonic", clock)
+    cache = PredictionCache(max_size=10)
+    cache.put("v1", "milk", [0.1])
+
+    clock.now += 10 ** 6
+
+    assert cache.get("v1", "milk") == [0.1]
+
+
+def test_titles_are_normalized():
+    cache = PredictionCache(max_size=10)
+    cache.put("v1", "  mleko   2%\t", [0.1])
+
+    assert cache.get("v1", "mleko 2%") == [0.1]
+
+
+def test_other_model_versions_bypass_the_cache():
+    cache = PredictionCache(max_size=10)
+    cache.put("v1", "milk", [0.1])
+
+    cache.put("v2", "bread", [0.2])
+    assert cache.get("v2", "milk") is None
+    assert cache.get("v1", "bread") is None
+
+    cache.set_model("v2")
+    assert cache.get("v2", "milk") is None
+    assert cache.stats()["model_name"] == "v2"
@@ -0,0 +1,68 @@
+import numpy as np
+
+from services.prediction_store import PredictionStore
+
+
+def test_written_prediction_is_read_back(tmp_path):
+    path = str(tmp_path / "predictions.db")
+    store = PredictionStore(path, "v1")
+    store.put("  mleko 2% ", [0.25, 0.75])
+    store.close()
+
+    store = PredictionStore(path, "v1")
+    try:
+        probabilities = store.get("mleko 2%")
+        assert probabilities.dtype == np.float32
+        assert probabilities.tolist() == [0.25, 0.75]
+        assert store.get("chleb") is None
+        assert store.stats()["hits"] == 1 and store.stats()["misses"] == 1
+    finally:
+        store.close()
+
+
+def test_get_many_keeps_order_across_chunks(tmp_path):
+    path = str(tmp_path / "predictions.db")
+    store = PredictionStore(path, "v1")
+    for index in range(5):
+        store.put(f"title {index}", [float(index)])
+    store.close()
+
+    store = PredictionStore(path, "v1")
+    try:
+        found = store.get_many(["title 4", "missing", "title 0", "title 4", "title 2"], chunk_size=2)
+        assert [None if value is None else value.tolist() for value in found] == [[4.0], None, [0.0], [4.0], [2.0]]
+    finally:
+        store.close()
+
+
+def test_predictions_of_other_model_versions_are_not_read(tmp_path):
+    path = str(tmp_path / "predictions.db")
+    store = PredictionStore(path, "v1")
+    store.put("milk", [1.0])
+    store.close()
+
+    store = PredictionStore(path, "v2")
+    try:
+        assert store.get("milk") is None
+    finally:
+        store.close()
+
+
+def test_hottest_ranks_titles_by_hits(tmp_path):
+    path = str(tmp_path / "predictions.db")
+    store = PredictionStore(path, "v1")
+    store.put("milk", [1.0])
+    store.put("bread", [2.0])
+    store.put("eggs", [3.0])
+    store.close()
+
+    store = PredictionStore(path, "v1")
+    store.get_many(["bread", "bread"])
+    store.count_hits(["eggs", "eggs", "eggs"])
+    store.close()
+
+    store = PredictionStore(path, "v1")
+    try:
+        assert [title for title, _ in store.hottest(2)] == ["eggs", "bread"]
+    finally:
+        store.close()
@@ -0,0 +1,127 @@
+import numpy as np
+import pytest
+
+torch = pytest.importorskip("torch")
+results_module = pytest.importorskip("ultralytics.engine.results")
+
+import services.yolo_service.yolo as yolo
+from services.yolo_service.yolo import letterbox, letterbox_own_rectangle, predict, predict_batch, get_best_detections
+
+IMGSZ = (640, 320)
+
+
+class StubObbModel:
+    """
+    Stands in for an Ultralytics OBB model: returns one Results object per source image, created under
+    torch.inference_mode() as Ultralytics does, with one box in the centre of the letterboxed image.
+    """
+
+    def __init__(self):
+        self.calls = []
+
+    def predict(self, source, imgsz=None, **kwargs):
+        self.calls.append((len(source), imgsz))
+        assert len({image.shape for image in source}) == 1
+        results = []
+        with torch.inference_mode():
+            for image in source:
+                height, width = image.shape[:2]
+                obb = torch.tensor([[width / 2, height / 2, width / 4, height / 4, 0.0, 0.9, 1.0]])
+                results.append(results_module.Results(image, path="", names={0: "date", 1: "nip"}, obb=obb))
+        return results
+
+
+class StubBoxModel(StubObbModel):
+
+    def predict(self, source, imgsz=None, **kwargs):
+        self.calls.append((len(source), imgsz))
+        results = []
+        with torch.inference_mode():
+            for image in source:
+                height, width = image.shape[:2]
+                boxes = torch.tensor([[width / 4, height / 4, width * 3 / 4, height * 3 / 4, 0.8, 0.0]])
+                results.append(results_module.Results(image, path="", names={0: "date"}, boxes=boxes))
+        return results
+
+
+def test_letterbox_fits_rectangle():
+    image = np.zeros((1000, 400, 3), dtype=np.uint8)
+    letterboxed, scale, (pad_x, pad_y) = letterbox(image, IMGSZ)
+    assert letterboxed.shape[:2] == IMGSZ
+    assert scale == pytest.approx(0.64)
+    assert (pad_x, pad_y) == (32, 0)
+
+
+def test_predict_batch_maps_obb_back_to_original_image():
+    images = [np.zeros((1000, 400, 3), dtype=np.uint8), np.zeros((600, 800, 3), dtype=np.uint8)]
+    model = StubObbModel()
+
+    results = predict_batch(model, images, IMGSZ)
+
+    assert model.calls == [(2, list(IMGSZ))]
+    for image, result in zip(images, results):
+        height, width = image.shape[:2]
+        assert result.orig_shape == (height, width)
+        x_center, y_center, box_width, box_height = result.obb.data[0, :4].tolist()
+        assert x_center == pytest.approx(width / 2, abs=1)
+        assert y_center == pytest.approx(height / 2, abs=1)
+
+    scale = letterbox(images[0], IMGSZ)[1]
+    assert results[0].obb.data[0, 2].item() == pytest.approx(IMGSZ[1] / 4 / scale, rel=1e-3)
+
+    detections = get_best_detections(results[:1])
+    assert detections['class_id'].tolist() == [1]
+    polygon = detections[0]['polygon']
+    assert polygon[:, 0].mean() == pytest.approx(200, abs=1)
+    assert polygon[:, 1].mean() == pytest.approx(500, abs=1)
+
+
+def test_predict_batch_maps_boxes_back_to_original_image():
+    image = np.zeros((1000, 400, 3), dtype=np.uint8)
+
+    result, = predict_batch(StubBoxModel(), [image], IMGSZ)
+
+    x1, y1, x2, y2 = result.boxes.xyxy[0].tolist()
+    assert (x1 + x2) / 2 == pytest.approx(200, abs=1)
+    assert (y1 + y2) / 2 == pytest.approx(500, abs=1)
+    assert 0 <= x1 < x2 <= 400 and 0 <= y1 < y2 <= 1000
+
+
+def test_own_rectangle_matches_ultralytics_single_image_preprocessing():
+    augment = pytest.importorskip("ultralytics.data.augment")
+    rng = np.random.default_rng(0)
+    for shape in [(1000, 400, 3), (900, 380, 3), (640, 640, 3), (333, 777, 3)]:
+        image = rng.integers(0, 255, shape, dtype=np.uint8)
+        expected = augment.LetterBox((640, 640), auto=True, stride=32)(image=image)
+        assert np.array_equal(letterbox_own_rectangle(image)[0], expected)
+
+
+def test_predict_batch_groups_images_by_rectangle():
+    images = [np.zeros((1000, 400, 3), dtype=np.uint8), np.zeros((640, 640, 3), dtype=np.uint8),
+              np.zeros((1010, 404, 3), dtype=np.uint8)]
+    model = StubObbModel()
+
+    results = predict_batch(model, images, None)
+
+    assert sorted(model.calls) == [(1, [640, 640]), (2, [640, 256])]
+    for image, result in zip(images, results):
+        assert result.orig_shape == image.shape[:2]
+        assert result.obb.data[0, 0].item() == pytest.approx(image.shape[1] / 2, abs=1)
+
+
+def test_batched_detections_match_single_image_detections(monkeypatch):
+    ultralytics = pytest.importorskip("ultralytics")
+    torch.manual_seed(0)
+    model = ultralytics.YOLO("yolov8n-obb.yaml")
+    # Untrained weights give only low-confidence boxes
+    monkeypatch.setattr(yolo, "CONF_THRESHOLD", 1e-4)
+    rng = np.random.default_rng(0)
+    images = [rng.integers(0, 255, shape, dtype=np.uint8)
+              for shape in [(1000, 400, 3), (900, 380, 3), (640, 640, 3), (1200, 500, 3)]]
+
+    batched = predict_batch(model, images, None)
+
+    for image, batched_result in zip(images, batched):
+        single_result, = predict(model, image, None)
+        assert len(single_result.obb) == len(batched_result.obb) > 0
+        assert torch.allclose(single_result.obb.data, batched_result.obb.data, atol=1e-3)
@@ -7,7 +7,7 @@ from ultralytics import YOLO
 import itertools
 
 from services.image_ocr import load_image
-from services.yolo_service.ocr import correct_ocr_text, get_tesseract_config, classify_payment_type_fuzzy
+from services.yolo_service.ocr import crop_detection, correct_ocr_text, get_tesseract_config, classify_payment_type_fuzzy
 from services.yolo_service.ocr_processing import process_pil
 from services.yolo_service.yolo import predict, get_best_detections
 from services.receipt_trimmer import perform_trimming
@@ -90,21 +90,7 @@ def process_entry(entry, base_path, config):
 
 
 def extract_cropped_area(image, detection):
-    if 'boxes' in detection:
-        box = detection['box']
-        x1, y1, x2, y2 = box.xyxy.tolist()[0]
-        x1, y1, x2, y2 = int(x1), int(y1), int(x2), int(y2)
-    elif 'obb' in detection:
-        obb = detection['obb']
-        coords = obb.xyxyxyxy.tolist()[0] if hasattr(obb.xyxyxyxy, 'tolist') else list(obb.xyxyxyxy)
-        points = [tuple(point) for point in coords]
-        x_coords, y_coords = zip(*points)
-        x1, y1 = max(int(min(x_coords)), 0), max(int(min(y_coords)), 0)
-        x2, y2 = min(int(max(x_coords)), image.shape[1]), min(int(max(y_coords)), image.shape[0])
-    else:
-        raise Exception("No boxes detected")
-
-    cropped_area = image[y1:y2, x1:x2]
+    cropped_area = crop_detection(image, detection)
     cropped_pil = Image.fromarray(cropped_area)
 
     return cropped_pil
@@ -134,7 +120,7 @@ def process_receipts_data(receipts_data, images_folder, output_root, trim_sequen
         results = predict(model, trimmed_image)
         best_detections = get_best_detections(results)
 
-        if not best_detections:
+        if len(best_detections) == 0:
             print(f"No detections for image: {filename}")
             raise Exception("YOLO ERROR")
 
@@ -142,7 +128,8 @@ def process_receipts_data(receipts_data, images_folder, output_root, trim_sequen
         image_output_folder = os.path.join(output_root, image_name)
         os.makedirs(image_output_folder, exist_ok=True)
 
-        for class_idx, detection in best_detections.items():
+        for detection in best_detections:
+            class_idx = int(detection['class_id'])
             class_name = CLASS_NAMES[class_idx] if class_idx < len(CLASS_NAMES) else "unknown_class"
             cropped_area = extract_cropped_area(trimmed_image, detection)
             if cropped_area is not None:
@@ -10,6 +10,29 @@ YOLO_DATA_PATH = os.path.join(YOLO_TRAINING_PATH, 'yolo_data')
 YOLO_RUNS_DIR = os.path.join(YOLO_TRAINING_PATH, 'yolo_training_runs')
 YOLO_TRAIN_SIZE = 0.8
 
+# Inference input (height, width) for tall trimmed receipts, multiples of 32, e.g. (640, 320); None - square 640.
+# Models are trained with rect=True at max(YOLO_IMGSZ); compare sizes with benchmarks/yolo_imgsz.py before
+# switching a model trained on squares
+YOLO_IMGSZ = None
+# With YOLO_IMGSZ None each image is letterboxed to its own rectangle: longer side YOLO_SQUARE_IMGSZ, shorter side
+# padded to a multiple of YOLO_STRIDE (as Ultralytics does for a single image); batches are grouped by rectangle
+YOLO_SQUARE_IMGSZ = 640
+YOLO_STRIDE = 32
+
+# Serving artifacts written next to weights/best.pt of each run, by backend (see YOLO_BACKEND in config.py)
+YOLO_BACKEND_ARTIFACTS = {
+    'pt': 'best.pt',
+    'onnx': 'best.onnx',
+    'openvino': 'best_openvino_model',
+    'openvino_int8': 'best_int8_openvino_model'
+}
+YOLO_EXPORT_FORMATS = ['onnx', 'openvino']
+YOLO_EXPORT_INT8 = False  # OpenVINO INT8 (calibrated on the training data), exported right after training only
+YOLO_EXPORT_IMGSZ = list(YOLO_IMGSZ) if YOLO_IMGSZ is not None else 640
+# Exported backends must give the same classes as best.pt with polygons within this IoU
+YOLO_PARITY_MIN_IOU = 0.9
+YOLO_PARITY_MAX_CONF_DIFF = 0.05
+
 OCR_PROCESSING_CONFIGURATION = {
     'clean_background': False,
     'morphological_operation': 'closeerode',
@@ -0,0 +1,112 @@
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from config import YOLO_MODEL
+from services.image_ocr import load_image, load_model
+from services.model_registry import get_yolo_weights_path
+from services.yolo_service.yolo import predict, get_best_detections
+from yoloTrainer.example_receipts_data import receipts_data
+from yoloTrainer.yolo_config import CLASS_NAMES, YOLO_PARITY_MIN_IOU, YOLO_PARITY_MAX_CONF_DIFF
+
+
+def polygon_iou(polygon_a, polygon_b):
+    # Oriented boxes are convex, so their intersection is exact
+    intersection, _ = cv2.intersectConvexConvex(polygon_a, polygon_b)
+    union = cv2.contourArea(polygon_a) + cv2.contourArea(polygon_b) - intersection
+    return intersection / union if union > 0 else 0.0
+
+
+def detect(model, image):
+    start = time.perf_counter()
+    detections = get_best_detections(predict(model, image))
+    return {int(detection['class_id']): detection for detection in detections}, time.perf_counter() - start
+
+
+def class_names(class_ids):
+    return sorted(CLASS_NAMES[class_id] for class_id in class_ids)
+
+
+def compare_detections(reference, candidate):
+    problems = []
+    if set(reference) != set(candidate):
+        problems.append(f"classes {class_names(reference)} != {class_names(candidate)}")
+
+    for class_id in sorted(set(reference) & set(candidate)):
+        iou = polygon_iou(reference[class_id]['polygon'], candidate[class_id]['polygon'])
+        conf_diff = abs(float(reference[class_id]['conf']) - float(candidate[class_id]['conf']))
+        if iou < YOLO_PARITY_MIN_IOU or conf_diff > YOLO_PARITY_MAX_CONF_DIFF:
+            problems.append(f"{CLASS_NAMES[class_id]}: IoU {iou:.3f}, conf diff {conf_diff:.3f}")
+    return problems
+
+
+def load_receipts(images_folder, trim):
+    # (name, image) of the example receipts; trimmed like in the service, which runs YOLO only on trimmed receipts
+    cnn_model = None
+    if trim:
+        from cnnTrimChecker.cnn_config import SEQUENCE_1
+        from cnnTrimChecker.cnn_service.cnn_predict import load_cnn_model
+        from services.receipt_trimmer import perform_trimming
+        cnn_model = load_cnn_model(SEQUENCE_1["model_name"])
+
+    receipts = []
+    for receipt in receipts_data:
+        image_path = os.path.join(images_folder, receipt[0] + ".jpg")
+        if not os.path.isfile(image_path):
+            print(f"File does not exist: {image_path}")
+            continue
+        image = load_image(image_path)
+        if cnn_model is not None:
+            image, flag = perform_trimming(image, SEQUENCE_1["combination_list"], cnn_model)
+            if not flag:
+                print(f"{receipt[0]}: not trimmed, skipped (the service does not run YOLO on it)")
+                continue
+        receipts.append((receipt[0], image))
+    return receipts
+
+
+def main(backend='onnx', run_name=YOLO_MODEL,
+         images_folder=os.path.join('..', 'frontend', 'public', 'exampleReceipts'), trim=True):
+    """
+    Checks that an exported backend detects the same fields as best.pt on the annotated example receipts, trimmed
+    first as in the service unless `trim` is False: the same classes, polygons with IoU >= YOLO_PARITY_MIN_IOU and
+    confidences within YOLO_PARITY_MAX_CONF_DIFF. Returns True if every receipt passes.
+    """
+    reference_model = load_model(get_yolo_weights_path(run_name, 'pt'))
+    candidate_model = load_model(get_yolo_weights_path(run_name, backend))
+
+    blank_image = np.zeros((640, 640, 3), dtype=np.uint8)
+    detect(reference_model, blank_image)
+    detect(candidate_model, blank_image)
+
+    checked = 0
+    failed = 0
+    reference_seconds = 0.0
+    candidate_seconds = 0.0
+
+    for name, image in load_receipts(images_folder, trim):
+        reference, seconds = detect(reference_model, image)
+        reference_seconds += seconds
+        candidate, seconds = detect(candidate_model, image)
+        candidate_seconds += seconds
+
+        checked += 1
+        problems = compare_detections(reference, candidate)
+        if problems:
+            failed += 1
+            print(f"{name}: " + "; ".join(problems))
+
+    print(f"\n{run_name}: pt vs {backend}{'' if trim else ' (untrimmed)'}")
+    print(f"Receipts matching: {checked - failed}/{checked}")
+    if checked:
+        print(f"Mean latency: pt {reference_seconds / checked * 1000:.1f} ms, "
+              f"{backend} {candidate_seconds / checked * 1000:.1f} ms")
+    return checked > 0 and failed == 0
+
+
+if __name__ == "__main__":
+    arguments = [argument for argument in sys.argv[1:] if argument != "--no-trim"]
+    sys.exit(0 if main(*arguments[:2], trim="--no-trim" not in sys.argv) else 1)
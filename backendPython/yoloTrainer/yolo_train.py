@@ -1,10 +1,12 @@
 import os
 import shutil
 import random
+import sys
 import yaml
 from ultralytics import YOLO
 
-from yolo_config import YOLO_DATA_PATH, YOLO_TRAINING_PATH, YOLO_MODELS_PATH, YOLO_TRAIN_SIZE, YOLO_RUNS_DIR
+from yolo_config import YOLO_DATA_PATH, YOLO_TRAINING_PATH, YOLO_MODELS_PATH, YOLO_TRAIN_SIZE, YOLO_RUNS_DIR, \
+    YOLO_EXPORT_FORMATS, YOLO_EXPORT_INT8, YOLO_EXPORT_IMGSZ, YOLO_IMGSZ
 
 
 def create_temp_yolo_structure(original_images_dir, original_labels_dir, temp_dir):
@@ -47,13 +49,15 @@ def generate_data_yaml(temp_dir, yaml_path, nc, names):
         yaml.dump(data, f)
 
 
-def train_yolov8_obb(data_yaml, weights, epochs, batch, imgsz, device, name, workers, lr0):
+def train_yolov8_obb(data_yaml, weights, epochs, batch, imgsz, device, name, workers, lr0, rect=False):
+    # rect=True trains on batches letterboxed to their aspect ratio (longer side imgsz) instead of squares
     model = YOLO(weights)
     results = model.train(
         data=data_yaml,
         epochs=epochs,
         batch=batch,
         imgsz=imgsz,
+        rect=rect,
         device=device,
         name=name,
         workers=workers,
@@ -62,6 +66,33 @@ def train_yolov8_obb(data_yaml, weights, epochs, batch, imgsz, device, name, wor
     return results.save_dir, results
 
 
+def export_yolo_model(weights_path, formats=YOLO_EXPORT_FORMATS, imgsz=YOLO_EXPORT_IMGSZ, int8=False,
+                      data_yaml=None):
+    """
+    Exports best.pt for CPU serving; the artifacts are written next to it (see YOLO_BACKEND_ARTIFACTS).
+    The batch dimension is dynamic, so the batched inference in the service works with every backend.
+    OpenVINO INT8 needs `data_yaml` to calibrate on.
+    """
+    model = YOLO(weights_path)
+    exported = []
+    for export_format in formats:
+        exported.append(model.export(format=export_format, imgsz=imgsz, dynamic=True, device='cpu'))
+        if export_format == 'openvino' and int8:
+            if data_yaml is None:
+                print("Skipping OpenVINO INT8 export: calibration data (data_yaml) is required")
+                continue
+            exported.append(model.export(format=export_format, imgsz=imgsz, dynamic=True, int8=True,
+                                         data=data_yaml, device='cpu'))
+    return exported
+
+
+def export_all_runs(formats=YOLO_EXPORT_FORMATS, imgsz=YOLO_EXPORT_IMGSZ):
+    for run_name in sorted(os.listdir(YOLO_RUNS_DIR)):
+        weights_path = os.path.join(YOLO_RUNS_DIR, run_name, 'weights', 'best.pt')
+        if os.path.isfile(weights_path):
+            print(f"Exporting {run_name}: {export_yolo_model(weights_path, formats, imgsz)}")
+
+
 def main(num_runs, models, epochs_list, batch_list, lr0_list):
     original_images_dir = os.path.join(YOLO_DATA_PATH, 'images')
     original_labels_dir = os.path.join(YOLO_DATA_PATH, 'labels')
@@ -114,14 +145,18 @@ def main(num_runs, models, epochs_list, batch_list, lr0_list):
                 weights=weights_path,
                 epochs=epochs,
                 batch=batch,
-                imgsz=640,
+                imgsz=max(YOLO_IMGSZ) if YOLO_IMGSZ is not None else 640,
                 device=device,
                 name=run_name,
                 workers=base_workers,
-                lr0=lr0
+                lr0=lr0,
+                rect=YOLO_IMGSZ is not None
             )
             shutil.move(save_dir, run_dir)
 
+            weights_path = os.path.join(run_dir, os.path.basename(save_dir), 'weights', 'best.pt')
+            print(f"Exported: {export_yolo_model(weights_path, int8=YOLO_EXPORT_INT8, data_yaml=data_yaml_path)}")
+
         except Exception as e:
             print(f"An error occurred during training run number {run}: {e}")
         finally:
@@ -132,6 +167,11 @@ def main(num_runs, models, epochs_list, batch_list, lr0_list):
 
 
 if __name__ == "__main__":
+    if sys.argv[1:] == ['export']:
+        # Exports runs trained before the export step existed
+        export_all_runs()
+        sys.exit()
+
     num_runs = 1
 
     models = [